@@ -26,18 +26,18 @@ async function loadSeedData() {
     // 2. Load quality PRs (in chunks)
     console.log('\n📊 Loading quality PRs...');
     const qualityFiles = readdirSync(seedDir).filter(f => f.startsWith('quality_prs_'));
-    let totalQualityPRs = 0;
     
-    for (const file of qualityFiles) {
+    // Chunks are independent keys, so write them concurrently
+    const chunkSizes = await Promise.all(qualityFiles.map(async (file) => {
       const chunk = JSON.parse(readFileSync(join(seedDir, file), 'utf8'));
       const chunkNum = file.match(/quality_prs_(\d+)\.json/)[1];
       await storage.set(`seed_quality_prs_${chunkNum}`, chunk);
-      totalQualityPRs += chunk.length;
-      console.log(`   ✅ Chunk ${chunkNum}: ${chunk.length} PRs`);
-    }
+      return chunk.length;
+    }));
+    const totalQualityPRs = chunkSizes.reduce((sum, n) => sum + n, 0);
     
     await storage.set('seed_quality_prs_count', qualityFiles.length);
-    console.log(`✅ Total quality PRs: ${totalQualityPRs}`);
+    console.log(`✅ Total quality PRs: ${totalQualityPRs} in ${qualityFiles.length} chunks`);
     
     // 3. Load risky PRs
     console.log('\n⚠️  Loading risky PRs...');
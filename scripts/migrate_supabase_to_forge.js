@@ -36,18 +36,39 @@ async function fetchFromSupabase(endpoint) {
   return await response.json();
 }
 
+/**
+ * Page through a query with limit/offset until it runs dry or hits maxRows,
+ * instead of silently stopping at the server's single-response row cap
+ */
+async function fetchAllFromSupabase(endpoint, { pageSize = 1000, maxRows = 5000 } = {}) {
+  const rows = [];
+  
+  while (rows.length < maxRows) {
+    const limit = Math.min(pageSize, maxRows - rows.length);
+    const page = await fetchFromSupabase(`${endpoint}&limit=${limit}&offset=${rows.length}`);
+    rows.push(...page);
+    if (page.length < limit) break;
+  }
+  
+  return rows;
+}
+
 async function migratePRData() {
   console.log('🚀 Starting Supabase → Forge Storage Migration...\n');
   
   try {
     // 1. Fetch PRs with quality metrics
     console.log('📊 Fetching quality PRs...');
-    const prs = await fetchFromSupabase('prs?select=*&limit=1000&order=created_at.desc');
+    // Select only the columns the seed files use rather than whole rows
+    const prs = await fetchAllFromSupabase(
+      'prs?select=id,doc_id,title,body,additions,deletions,changed_files,labels&order=created_at.desc,id.desc'
+    );
     console.log(`✅ Fetched ${prs.length} PRs`);
     
     // 2. Fetch embeddings
     console.log('\n🧠 Fetching embeddings...');
-    const embeddings = await fetchFromSupabase('embeddings?select=*&limit=1000');
+    // Only the first 100 make it into the seed index, so fetch just those columns and rows
+    const embeddings = await fetchFromSupabase('embeddings?select=pr_id,content,section,embedding&limit=100');
     console.log(`✅ Fetched ${embeddings.length} embeddings`);
     
     // 3. Process and structure data for Forge storage
@@ -129,6 +150,8 @@ async function migratePRData() {
       fs.mkdirSync(outputDir, { recursive: true });
     }
     
+    // Data files are only read back by the loader, so write them compact;
+    // metadata.json stays indented for people to read
     // Split into chunks to avoid size limits
     const chunkSize = 200;
     
@@ -136,23 +159,14 @@ async function migratePRData() {
     const qualityChunks = Math.ceil(seedData.quality_prs.length / chunkSize);
     for (let i = 0; i < qualityChunks; i++) {
       const chunk = seedData.quality_prs.slice(i * chunkSize, (i + 1) * chunkSize);
-      fs.writeFileSync(
-        path.join(outputDir, `quality_prs_${i + 1}.json`),
-        JSON.stringify(chunk, null, 2)
-      );
+      writeJsonArray(path.join(outputDir, `quality_prs_${i + 1}.json`), chunk);
     }
     
     // Risky PRs
-    fs.writeFileSync(
-      path.join(outputDir, 'risky_prs.json'),
-      JSON.stringify(seedData.risky_prs, null, 2)
-    );
+    writeJsonArray(path.join(outputDir, 'risky_prs.json'), seedData.risky_prs);
     
     // Embeddings
-    fs.writeFileSync(
-      path.join(outputDir, 'embeddings.json'),
-      JSON.stringify(seedData.embeddings_index, null, 2)
-    );
+    writeJsonArray(path.join(outputDir, 'embeddings.json'), seedData.embeddings_index);
     
     // Metadata
     fs.writeFileSync(
@@ -179,6 +193,24 @@ async function migratePRData() {
   }
 }
 
+/**
+ * Write an array as compact JSON one element at a time, so the whole
+ * file never has to exist as a single string in memory
+ */
+function writeJsonArray(filePath, items) {
+  const fs = require('fs');
+  const fd = fs.openSync(filePath, 'w');
+  try {
+    fs.writeSync(fd, '[');
+    items.forEach((item, i) => {
+      fs.writeSync(fd, (i ? ',' : '') + JSON.stringify(item));
+    });
+    fs.writeSync(fd, ']');
+  } finally {
+    fs.closeSync(fd);
+  }
+}
+
 function calculateQualityScore(pr) {
   let score = 0.5; // Start neutral
   
@@ -7,6 +7,28 @@
 
 const fetch = require('node-fetch');
 
+// Static sections of the generated PR body and preview, assembled once
+const PR_TESTING_CHECKLIST =
+  `### 🧪 Testing\n\n` +
+  `- [ ] Unit tests pass\n` +
+  `- [ ] Integration tests pass\n` +
+  `- [ ] Security scan passes\n` +
+  `- [ ] Manual testing completed\n\n`;
+
+const PR_FOOTER =
+  `\n---\n\n` +
+  `🤖 **This PR was automatically generated by Code Risk Radar**\n` +
+  `⚠️ **Please review carefully before merging**\n\n`;
+
+const PREVIEW_CONFIRMATION_NOTICE =
+  `---\n\n` +
+  `🚨 **MANUAL CONFIRMATION REQUIRED**\n\n` +
+  `To create this branch and PR, you MUST:\n` +
+  `1. Review the preview above carefully\n` +
+  `2. Set \`confirm=true\` explicitly\n` +
+  `3. Ensure you have the necessary permissions\n\n` +
+  `**This is a write operation and cannot be easily undone.**\n`;
+
 /**
  * Example Input JSON:
  * {
@@ -98,11 +120,7 @@ function buildPRContent(riskAnalysis, fixDescription, metadata = {}) {
     body += '\n';
   }
   
-  body += `### 🧪 Testing\n\n`;
-  body += `- [ ] Unit tests pass\n`;
-  body += `- [ ] Integration tests pass\n`;
-  body += `- [ ] Security scan passes\n`;
-  body += `- [ ] Manual testing completed\n\n`;
+  body += PR_TESTING_CHECKLIST;
   
   body += `### 📚 References\n\n`;
   if (metadata.original_pr) {
@@ -112,9 +130,7 @@ function buildPRContent(riskAnalysis, fixDescription, metadata = {}) {
     body += `- Jira Task: ${metadata.jira_task}\n`;
   }
   
-  body += `\n---\n\n`;
-  body += `🤖 **This PR was automatically generated by Code Risk Radar**\n`;
-  body += `⚠️ **Please review carefully before merging**\n\n`;
+  body += PR_FOOTER;
   body += `<sub>Generated at ${new Date().toISOString()}</sub>\n`;
   
   return { title, body };
@@ -132,13 +148,7 @@ function generatePreview(branchName, prContent, repository, baseBranch) {
   preview += `---\n\n`;
   preview += `### PR Title\n${prContent.title}\n\n`;
   preview += `### PR Body\n${prContent.body}\n\n`;
-  preview += `---\n\n`;
-  preview += `🚨 **MANUAL CONFIRMATION REQUIRED**\n\n`;
-  preview += `To create this branch and PR, you MUST:\n`;
-  preview += `1. Review the preview above carefully\n`;
-  preview += `2. Set \`confirm=true\` explicitly\n`;
-  preview += `3. Ensure you have the necessary permissions\n\n`;
-  preview += `**This is a write operation and cannot be easily undone.**\n`;
+  preview += PREVIEW_CONFIRMATION_NOTICE;
   
   return preview;
 }
@@ -26,10 +26,10 @@ resolver.define('getAIRemediation', async (req) => {
         }
 
         // Generate fresh suggestions
-        const result = await geminiService.generateRemediations(prData, riskAnalysis);
+        const result = await geminiService.generateRemediations(prData, riskAnalysis, { forceRefresh });
 
         // Cache for 1 hour ONLY if successful
-        if (result.success) {
+        if (result.success && !result.skippedAI) {
             await storage.set(cacheKey, {
                 data: result,
                 timestamp: Date.now()
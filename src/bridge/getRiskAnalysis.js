@@ -7,6 +7,18 @@ import geminiService from '../services/geminiService.js';
 
 const resolver = new Resolver();
 
+// File-path classifiers, each list folded into one case-insensitive alternation
+const CRITICAL_PATH_PATTERN = /auth|security|password|token|api|config|database|payment/i;
+const DOC_PATH_PATTERN = /readme|\.md$|\.txt$|docs?\//i;
+const TEST_PATH_PATTERN = /test|spec|__tests__/i;
+
+// Static parts of the resolver responses, built once. Forge serializes the
+// returned object, so sharing these frozen pieces across requests is safe
+const RESPONSE_VERSION = '2.1-id-fix';
+const DEFAULT_DATA_SOURCE = 'bitbucket_ml_cosine_similarity';
+const FALLBACK_STATS = Object.freeze({ additions: 0, deletions: 0, changedFiles: 0 });
+const FALLBACK_FACTORS = Object.freeze({ complexity: 0.3, changeSize: 0.3, fileRisk: 0.3, historical: 0.3 });
+
 /**
  * MAIN RISK ANALYSIS HANDLER
  */
@@ -14,7 +26,8 @@ resolver.define('getRiskAnalysis', async (req) => {
   const { context } = req;
 
   console.log('=== Risk Analysis Started ===');
-  console.log('Context:', JSON.stringify(context, null, 2));
+  // Log the extension type rather than pretty-printing the whole context
+  console.log('Context extension:', context?.extension?.type);
 
   try {
     // Extract Bitbucket PR information
@@ -44,17 +57,10 @@ resolver.define('getRiskAnalysis', async (req) => {
       title: prDetails.title,
       additions: prDetails.additions,
       deletions: prDetails.deletions,
-      files: prDetails.changed_files,
-      fileList: prDetails.files.map(f => f.path).join(', ')
+      files: prDetails.changed_files
     });
 
     // Calculate REAL risk score using ML with cosine similarity
-    console.log('🔬 Calculating ML risk score with cosine similarity:', {
-      additions: prDetails.additions,
-      deletions: prDetails.deletions,
-      changed_files: prDetails.changed_files,
-      title: prDetails.title
-    });
 
     const prData = {
       id: `bitbucket-${prInfo.prId}`,
@@ -66,8 +72,13 @@ resolver.define('getRiskAnalysis', async (req) => {
       files: prDetails.files || []
     };
 
-    // Use new ML service with vector embeddings
-    const riskAnalysis = await mlService.calculateMLRiskScore(prData);
+    // Run the similarity search once and share it: the risk score, the
+    // suggestions and the similar-incidents list all rank the same PRs
+    const similarPRs = await mlService.findSimilarPRs(prData, 20);
+    const [riskAnalysis, suggestions] = await Promise.all([
+      mlService.calculateMLRiskScore(prData, similarPRs),
+      mlService.getPRImprovementSuggestions(prData, similarPRs)
+    ]);
 
     console.log('✅ ML Risk Analysis:', {
       score: riskAnalysis.risk_score,
@@ -78,16 +89,7 @@ resolver.define('getRiskAnalysis', async (req) => {
     // Get file risks
     let filesChanged = prDetails.files || [];
 
-    // Get PR improvement suggestions using ML
-    const suggestions = await mlService.getPRImprovementSuggestions(prData);
-
-    console.log('💡 Generated', suggestions.length, 'improvement suggestions');
-
-    // Find similar PRs using cosine similarity
-    const prText = `${prDetails.title} ${prDetails.description || ''}`;
-    const similarPRs = await mlService.findSimilarPRs(prText, 5);
-
-    console.log('🔍 Found', similarPRs.length, 'similar PRs');
+    console.log(`💡 ${suggestions.length} suggestions, ${similarPRs.length} similar PRs`);
 
     const result = {
       prId: prInfo.prId,
@@ -114,23 +116,7 @@ resolver.define('getRiskAnalysis', async (req) => {
         reference: s.reference
       })),
       // Map ML factors to UI-friendly format
-      risk_factors: [
-        {
-          name: 'Code Size',
-          value: Math.round(Math.min((riskAnalysis.factors?.size_vs_benchmark || 1) * 20, 100)),
-          description: riskAnalysis.factors?.size_vs_benchmark > 1.5 ? 'Large change' : 'Moderate size'
-        },
-        {
-          name: 'File Complexity',
-          value: Math.round(Math.min((riskAnalysis.factors?.files_vs_benchmark || 1) * 20, 100)),
-          description: riskAnalysis.factors?.files_vs_benchmark > 1.5 ? 'Wide scope' : 'Focused changes'
-        },
-        {
-          name: 'Documentation',
-          value: Math.round(100 - (Math.min(riskAnalysis.factors?.title_quality || 1, 1) * 100)),
-          description: riskAnalysis.factors?.title_quality < 0.5 ? 'Poorly documented' : 'Good context'
-        }
-      ],
+      risk_factors: buildRiskFactors(riskAnalysis.factors || {}),
       factors: riskAnalysis.factors,
       similarIncidents: similarPRs.slice(0, 5).map(pr => ({
         id: pr.doc_id || pr.id,
@@ -143,16 +129,14 @@ resolver.define('getRiskAnalysis', async (req) => {
           changed_files: pr.changed_files
         }
       })),
-      dataSource: riskAnalysis.data_source || 'bitbucket_ml_cosine_similarity',
+      dataSource: riskAnalysis.data_source || DEFAULT_DATA_SOURCE,
       mlModel: riskAnalysis.ml_model,
       ml_analysis: riskAnalysis, // Full ML data
       timestamp: new Date().toISOString(),
-      version: '2.1-id-fix',
+      version: RESPONSE_VERSION,
     };
 
-    console.log('✨ Analysis Complete!');
-    console.log('📊 Final Risk Score:', result.risk_score);
-    console.log('📁 Files Changed:', result.filesChanged.map(f => `${f.filename} (${f.changes} changes, risk: ${f.risk_score})`));
+    console.log('✨ Analysis Complete! Final Risk Score:', result.risk_score);
 
     // Record metrics for team dashboard
     await teamMetricsService.recordPRMetric(
@@ -204,10 +188,10 @@ resolver.define('getAIRemediation', async (req) => {
     }
 
     // Generate fresh suggestions
-    const result = await geminiService.generateRemediations(prData, riskAnalysis);
+    const result = await geminiService.generateRemediations(prData, riskAnalysis, { forceRefresh });
 
     // Cache ONLY if successful
-    if (result.success) {
+    if (result.success && !result.skippedAI) {
       await storage.set(cacheKey, {
         data: result,
         timestamp: Date.now()
@@ -285,8 +269,15 @@ async function fetchBitbucketPR(prInfo) {
     const prUrl = route`/2.0/repositories/${workspaceUuidWithBraces}/${repoUuidWithBraces}/pullrequests/${prInfo.prId}`;
     const diffstatUrl = route`/2.0/repositories/${workspaceUuidWithBraces}/${repoUuidWithBraces}/pullrequests/${prInfo.prId}/diffstat`;
 
-    // Use asApp() for app-level authentication
-    const prResponse = await api.asApp().requestBitbucket(prUrl);
+    // Use asApp() for app-level authentication; the PR and its diffstat are
+    // independent, so both requests are in flight at once
+    const [prResponse, diffResponse] = await Promise.all([
+      api.asApp().requestBitbucket(prUrl),
+      api.asApp().requestBitbucket(diffstatUrl).catch(diffError => {
+        console.error('Error fetching diffstat:', diffError);
+        return null;
+      })
+    ]);
 
     if (prResponse.status !== 200) {
       const error = await prResponse.text();
@@ -302,22 +293,18 @@ async function fetchBitbucketPR(prInfo) {
     let deletions = 0;
 
     try {
-      console.log('🔍 Fetching diffstat...');
-      const diffResponse = await api.asApp().requestBitbucket(diffstatUrl);
-
-      if (diffResponse.status === 200) {
+      if (diffResponse?.status === 200) {
         const diffData = await diffResponse.json();
-        files = (diffData.values || []).map(f => ({
-          ...f,
-          path: f.new?.path || f.old?.path || 'unknown'
-        }));
-
-        files.forEach(f => {
+        // The parsed entries are ours, so tag each with its path in place and
+        // total the line counts in the same pass instead of copying every entry
+        files = diffData.values || [];
+        for (const f of files) {
+          f.path = f.new?.path || f.old?.path || 'unknown';
           additions += f.lines_added || 0;
           deletions += f.lines_removed || 0;
-        });
+        }
 
-      } else {
+      } else if (diffResponse) {
         const error = await diffResponse.text();
         console.error('Diffstat fetch failed:', diffResponse.status, error);
       }
@@ -350,20 +337,44 @@ function calculateFileRisk(file) {
   const changeScore = Math.min(totalChanges / 100, 1);
 
   const path = file.path || file.filename || '';
-  const criticalPatterns = ['auth', 'security', 'password', 'token', 'api', 'config', 'database', 'payment'];
-  const isCritical = criticalPatterns.some(p => path.toLowerCase().includes(p));
 
-  if (path.match(/readme|\.md$|\.txt$|docs?\//i)) {
+  if (DOC_PATH_PATTERN.test(path)) {
     return Math.min(changeScore * 0.2, 0.3);
   }
 
-  if (path.match(/test|spec|__tests__/i)) {
+  if (TEST_PATH_PATTERN.test(path)) {
     return Math.min(changeScore * 0.4, 0.5);
   }
 
+  const isCritical = CRITICAL_PATH_PATTERN.test(path);
   return Math.min(changeScore * (isCritical ? 1.2 : 0.8), 1);
 }
 
+/**
+ * UI risk factor bars from the ML factors
+ */
+function buildRiskFactors(factors) {
+  const { size_vs_benchmark: size, files_vs_benchmark: files, title_quality: titleQuality } = factors;
+
+  return [
+    {
+      name: 'Code Size',
+      value: Math.round(Math.min((size || 1) * 20, 100)),
+      description: size > 1.5 ? 'Large change' : 'Moderate size'
+    },
+    {
+      name: 'File Complexity',
+      value: Math.round(Math.min((files || 1) * 20, 100)),
+      description: files > 1.5 ? 'Wide scope' : 'Focused changes'
+    },
+    {
+      name: 'Documentation',
+      value: Math.round(100 - (Math.min(titleQuality || 1, 1) * 100)),
+      description: titleQuality < 0.5 ? 'Poorly documented' : 'Good context'
+    }
+  ];
+}
+
 /**
  * Default response when something goes wrong
  */
@@ -373,23 +384,14 @@ function getDefaultResponse(message) {
     risk_score: 0.3,
     confidence: 0.1,
     filesChanged: [],
-    stats: {
-      additions: 0,
-      deletions: 0,
-      changedFiles: 0,
-    },
+    stats: FALLBACK_STATS,
     suggestions: [{
       title: 'Unable to analyze',
       description: message,
       impact: 0,
       priority: 'low',
     }],
-    factors: {
-      complexity: 0.3,
-      changeSize: 0.3,
-      fileRisk: 0.3,
-      historical: 0.3,
-    },
+    factors: FALLBACK_FACTORS,
     similarIncidents: [],
     dataSource: 'error_fallback',
     timestamp: new Date().toISOString(),
@@ -7,17 +7,16 @@ resolver.define('getTeamDashboard', async (req) => {
     console.log('📊 Team dashboard requested');
 
     try {
-        const [health, hotZones, timeWindows, metrics] = await Promise.all([
-            teamMetricsService.calculateTeamHealth(),
-            teamMetricsService.getHotZones(),
-            teamMetricsService.getRiskyTimeWindows(),
-            teamMetricsService.getTeamMetrics()
+        // Read the metrics from storage once and compute every panel from it
+        const metrics = await teamMetricsService.getTeamMetrics();
+        const [health, hotZones, timeWindows] = await Promise.all([
+            teamMetricsService.calculateTeamHealth(metrics),
+            teamMetricsService.getHotZones(metrics),
+            teamMetricsService.getRiskyTimeWindows(metrics)
         ]);
 
         // Last 30 days for trend chart
-        const thirtyDaysAgo = Date.now() - (30 * 24 * 60 * 60 * 1000);
-        const trendData = metrics
-            .filter(m => m.timestamp > thirtyDaysAgo)
+        const trendData = teamMetricsService.getRecentMetrics(metrics, 30)
             .map(m => ({
                 date: new Date(m.timestamp).toISOString().split('T')[0],
                 riskScore: m.riskScore
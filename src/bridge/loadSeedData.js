@@ -34,14 +34,13 @@ resolver.define('loadSeedData', async (req) => {
       .filter(f => f.startsWith('quality_prs_'))
       .sort();
     
-    let totalQuality = 0;
-    for (let i = 0; i < qualityFiles.length; i++) {
-      const filePath = path.join(seedDataPath, qualityFiles[i]);
-      const qualityPRs = JSON.parse(fs.readFileSync(filePath, 'utf-8'));
+    // Chunks are independent keys, so write them concurrently
+    const chunkSizes = await Promise.all(qualityFiles.map(async (file, i) => {
+      const qualityPRs = JSON.parse(fs.readFileSync(path.join(seedDataPath, file), 'utf-8'));
       await storage.set(`seed_quality_prs_${i + 1}`, qualityPRs);
-      totalQuality += qualityPRs.length;
-      console.log(`   ✅ Chunk ${i + 1}: ${qualityPRs.length} PRs`);
-    }
+      return qualityPRs.length;
+    }));
+    const totalQuality = chunkSizes.reduce((sum, n) => sum + n, 0);
     await storage.set('seed_quality_prs_count', qualityFiles.length);
     console.log(`✅ Stored ${totalQuality} quality PRs in ${qualityFiles.length} chunks`);
     
@@ -3,6 +3,7 @@ import api, { route } from '@forge/api';
 import { analyzeRisks } from './riskAnalyzer';
 import { createJiraIssueWithConfirmation } from './jiraIntegration';
 import { storePrRisks, getPrRisks } from './storage';
+import { storeRiskEmbeddings } from './vectorSearch';
 
 const resolver = new Resolver();
 
@@ -34,6 +35,14 @@ resolver.define('handlePrCreated', async ({ payload }) => {
     // Store results
     await storePrRisks(prId, risks);
     
+    // Index risks for similar-incident search; best-effort, the analysis
+    // result doesn't depend on it
+    try {
+      await storeRiskEmbeddings(risks, { prId, repoSlug });
+    } catch (error) {
+      console.error('Failed to index risk embeddings:', error);
+    }
+    
     // Create Jira issues for high severity risks (requires user confirmation)
     const highSeverityRisks = risks.filter(r => r.severity === 'HIGH');
     
@@ -1,9 +1,15 @@
-import OpenAI from 'openai';
+import { createHash } from 'crypto';
+import { getOpenAI } from './services/openaiClient.js';
+import { LRUCache } from './services/lruCache.js';
 
-// Initialize OpenAI client (API key should be stored in Forge environment variables)
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
-});
+const CHARS_PER_TOKEN = 4; // Rough average for code and English text
+const PROMPT_DIFF_TOKEN_BUDGET = 750; // Diff share of the LLM prompt
+const ANALYSIS_CACHE_SIZE = 100; // Recent diffs whose analysis is kept in memory
+
+// Webhooks re-fire for the same diff (created, updated, comment); keep recent
+// results in an LRU keyed by a hash of the diff.
+// Only valid while scoring ignores `context` (see scoreRisksByImpact)
+const analysisCache = new LRUCache(ANALYSIS_CACHE_SIZE);
 
 /**
  * Risk patterns to detect via regex
@@ -31,7 +37,8 @@ const RISK_PATTERNS = [
     pattern: /console\.(log|debug|info)\s*\(/gi,
     severity: 'LOW',
     category: 'QUALITY',
-    description: 'Console statements should be removed before production'
+    description: 'Console statements should be removed before production',
+    fix: 'Remove the statement, or route it through a logger with levels'
   },
   {
     id: 'todo-comment',
@@ -39,7 +46,8 @@ const RISK_PATTERNS = [
     pattern: /\/\/\s*TODO:|#\s*TODO:/gi,
     severity: 'LOW',
     category: 'QUALITY',
-    description: 'TODO comment indicates incomplete work'
+    description: 'TODO comment indicates incomplete work',
+    fix: 'Finish the work before merging, or track it in an issue and reference it'
   },
   {
     id: 'eval-usage',
@@ -55,38 +63,49 @@ const RISK_PATTERNS = [
  * Analyze code diff for security and quality risks
  */
 export async function analyzeRisks(diffText, context = {}) {
+  const cacheKey = createHash('sha256').update(diffText).digest('hex');
+  const cached = analysisCache.get(cacheKey);
+  if (cached) {
+    return cached.map(risk => ({ ...risk }));
+  }
+  
   const risks = [];
+  let llmFailed = false;
   let callCount = 0;
   const MAX_LLM_CALLS = 10; // Rate limiting
   
-  // Phase 1: Regex-based pattern matching
+  // Phase 1: Regex-based pattern matching, one scan per pattern since matches
+  // from different patterns can overlap (e.g. a secret inside a query string)
+  const lineStarts = getLineStarts(diffText);
+  
   for (const pattern of RISK_PATTERNS) {
-    const matches = diffText.match(pattern.pattern);
-    if (matches) {
-      for (const match of matches) {
-        risks.push({
-          id: `${pattern.id}-${risks.length}`,
-          type: pattern.id,
-          name: pattern.name,
-          severity: pattern.severity,
-          category: pattern.category,
-          description: pattern.description,
-          snippet: match,
-          lineNumber: findLineNumber(diffText, match),
-          detectionMethod: 'REGEX'
-        });
-      }
+    for (const match of diffText.matchAll(pattern.pattern)) {
+      risks.push({
+        id: `${pattern.id}-${risks.length}`,
+        type: pattern.id,
+        name: pattern.name,
+        severity: pattern.severity,
+        category: pattern.category,
+        description: pattern.description,
+        snippet: match[0],
+        lineNumber: findLineNumber(lineStarts, match.index),
+        detectionMethod: 'REGEX',
+        ...(pattern.fix && { suggestedFix: pattern.fix })
+      });
     }
   }
   
-  // Phase 2: LLM-based deep analysis (only if regex found risks or for complex patterns)
-  if (risks.length > 0 && callCount < MAX_LLM_CALLS) {
+  // Phase 2: LLM-based deep analysis for risks that need it; patterns with a
+  // canned fix (debug statements, TODOs) are fully explained by the pattern
+  const llmRisks = risks.filter(risk => !risk.suggestedFix);
+  
+  if (llmRisks.length > 0 && callCount < MAX_LLM_CALLS) {
     try {
-      const enhancedRisks = await enhanceRisksWithLLM(diffText, risks);
+      const enhancedRisks = await enhanceRisksWithLLM(diffText, llmRisks);
       callCount++;
       
       // Merge LLM insights
-      risks.forEach((risk, index) => {
+      llmRisks.forEach((risk, index) => {
         if (enhancedRisks[index]) {
           risk.llmInsight = enhancedRisks[index].insight;
           risk.suggestedFix = enhancedRisks[index].fix;
@@ -94,6 +113,7 @@ export async function analyzeRisks(diffText, context = {}) {
       });
     } catch (error) {
       console.error('LLM analysis failed:', error);
+      llmFailed = true;
       // Continue with regex-only results
     }
   }
@@ -101,7 +121,23 @@ export async function analyzeRisks(diffText, context = {}) {
   // Phase 3: Score risks by business impact (using historical data if available)
   const scoredRisks = await scoreRisksByImpact(risks, context);
   
-  return scoredRisks;
+  // Don't pin regex-only results; a later call may get the LLM insights
+  if (!llmFailed) {
+    analysisCache.set(cacheKey, scoredRisks);
+  }
+  
+  return scoredRisks.map(risk => ({ ...risk }));
+}
+
+/**
+ * Trim text to roughly `maxTokens` tokens, cutting at a line boundary
+ */
+function truncateToTokenBudget(text, maxTokens) {
+  const maxChars = maxTokens * CHARS_PER_TOKEN;
+  if (text.length <= maxChars) return text;
+  
+  const cut = text.lastIndexOf('\n', maxChars);
+  return `${text.slice(0, cut > 0 ? cut : maxChars)}\n... (truncated)`;
 }
 
 /**
@@ -114,7 +150,7 @@ async function enhanceRisksWithLLM(diffText, risks) {
 
 Code diff:
 \`\`\`
-${diffText.substring(0, 3000)} // Truncate to avoid token limits
+${truncateToTokenBudget(diffText, PROMPT_DIFF_TOKEN_BUDGET)}
 \`\`\`
 
 Detected risks:
@@ -129,7 +165,7 @@ Respond in JSON format:
   }
 ]`;
 
-  const response = await openai.chat.completions.create({
+  const response = await getOpenAI().chat.completions.create({
     model: 'gpt-4-turbo-preview',
     messages: [
       { role: 'system', content: 'You are a code security analyst.' },
@@ -155,55 +191,104 @@ Respond in JSON format:
 async function scoreRisksByImpact(risks, context) {
   // TODO: Integrate with vector search to find similar past incidents
   // For MVP, use simple severity-based scoring
+  // NOTE: analyzeRisks caches results by diff alone; once scoring reads
+  // `context`, add the fields it uses to that cache key
   
-  return risks.map(risk => ({
-    ...risk,
-    impactScore: calculateImpactScore(risk),
-    priority: calculatePriority(risk)
-  }));
+  return risks.map(risk => {
+    const impactScore = calculateImpactScore(risk);
+    return {
+      ...risk,
+      impactScore,
+      priority: calculatePriority(impactScore)
+    };
+  });
+}
+
+// Priority bands by impact score, highest first; the last band catches everything below
+const PRIORITY_BANDS = [
+  { min: 80, priority: 'CRITICAL' },
+  { min: 60, priority: 'HIGH' },
+  { min: 30, priority: 'MEDIUM' },
+  { min: -Infinity, priority: 'LOW' }
+];
+
+/**
+ * Impact score weights: base score by severity, scaled by category
+ */
+const SEVERITY_SCORES = {
+  'HIGH': 80,
+  'MEDIUM': 50,
+  'LOW': 20
+};
+
+const CATEGORY_MULTIPLIERS = {
+  'SECURITY': 1.2,
+  'QUALITY': 0.8,
+  'PERFORMANCE': 1.0
+};
+
+/**
+ * Every known severity/category pair folded into its final score up front:
+ * IMPACT_SCORES[severity][category]
+ */
+const IMPACT_SCORES = {};
+for (const [severity, baseScore] of Object.entries(SEVERITY_SCORES)) {
+  IMPACT_SCORES[severity] = {};
+  for (const [category, multiplier] of Object.entries(CATEGORY_MULTIPLIERS)) {
+    IMPACT_SCORES[severity][category] = Math.min(100, Math.round(baseScore * multiplier));
+  }
 }
 
 /**
  * Calculate impact score (0-100)
  */
 function calculateImpactScore(risk) {
-  const severityScores = {
-    'HIGH': 80,
-    'MEDIUM': 50,
-    'LOW': 20
-  };
-  
-  const categoryMultiplier = {
-    'SECURITY': 1.2,
-    'QUALITY': 0.8,
-    'PERFORMANCE': 1.0
-  };
-  
-  const baseScore = severityScores[risk.severity] || 50;
-  const multiplier = categoryMultiplier[risk.category] || 1.0;
+  const score = IMPACT_SCORES[risk.severity]?.[risk.category];
+  if (score !== undefined) return score;
   
+  // Unknown severity or category: fall back to the neutral weights
+  const baseScore = SEVERITY_SCORES[risk.severity] || 50;
+  const multiplier = CATEGORY_MULTIPLIERS[risk.category] || 1.0;
   return Math.min(100, Math.round(baseScore * multiplier));
 }
 
 /**
- * Calculate priority (CRITICAL, HIGH, MEDIUM, LOW)
+ * Calculate priority (CRITICAL, HIGH, MEDIUM, LOW) from an impact score
  */
-function calculatePriority(risk) {
-  if (risk.impactScore >= 80) return 'CRITICAL';
-  if (risk.impactScore >= 60) return 'HIGH';
-  if (risk.impactScore >= 30) return 'MEDIUM';
-  return 'LOW';
+function calculatePriority(impactScore) {
+  return PRIORITY_BANDS.find(band => impactScore >= band.min).priority;
 }
 
 /**
- * Find line number of a match in diff
+ * Collect the offset at which each line of the diff starts (single scan)
  */
-function findLineNumber(diffText, match) {
-  const lines = diffText.split('\n');
-  for (let i = 0; i < lines.length; i++) {
-    if (lines[i].includes(match)) {
-      return i + 1;
+function getLineStarts(diffText) {
+  const lineStarts = [0];
+  let newline = diffText.indexOf('\n');
+  
+  while (newline !== -1) {
+    lineStarts.push(newline + 1);
+    newline = diffText.indexOf('\n', newline + 1);
+  }
+  
+  return lineStarts;
+}
+
+/**
+ * Find line number of a match offset in diff (binary search over line starts)
+ */
+function findLineNumber(lineStarts, offset) {
+  let low = 0;
+  let high = lineStarts.length - 1;
+  
+  while (low < high) {
+    const mid = (low + high + 1) >> 1;
+    if (lineStarts[mid] <= offset) {
+      low = mid;
+    } else {
+      high = mid - 1;
     }
   }
-  return null;
+  
+  return low + 1;
 }
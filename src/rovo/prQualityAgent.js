@@ -12,6 +12,14 @@ const { calculateMLRiskScore, findSimilarPRs, getPRImprovementSuggestions } = ml
 
 const resolver = new Resolver();
 
+// Overall score bands, highest first; the last band catches everything below
+const SCORE_BANDS = [
+  { min: 80, grade: 'A', recommendation: '🎉 Excellent work! This PR meets high-quality standards. Ready for review.' },
+  { min: 60, grade: 'B', recommendation: '👍 Good PR! Address the key suggestions to reach top-tier quality.' },
+  { min: 40, grade: 'C', recommendation: '⚠️ Needs improvement. Follow the action plan to significantly enhance quality.' },
+  { min: -Infinity, grade: 'D', recommendation: '🔴 Significant improvements required. Review the comprehensive suggestions carefully.' }
+];
+
 resolver.define('improvePRQuality', async (req) => {
   const { context, payload } = req;
   const { action, prData } = payload || {};
@@ -55,15 +63,16 @@ resolver.define('improvePRQuality', async (req) => {
 
 /**
  * Analyze PR and provide risk assessment
+ * Pass `similarPRs` (from findSimilarPRs, best first) to reuse an existing search
  */
-async function analyzePR(prData) {
+async function analyzePR(prData, similarPRs = null) {
   const { title, body, additions, deletions, changed_files } = prData;
   
   // Calculate ML risk score
-  const riskAnalysis = await calculateMLRiskScore(prData);
+  const riskAnalysis = await calculateMLRiskScore(prData, similarPRs);
   
   // Get improvement suggestions
-  const suggestions = await getPRImprovementSuggestions(prData);
+  const suggestions = await getPRImprovementSuggestions(prData, similarPRs);
   
   const riskLevel = riskAnalysis.risk_score < 0.4 ? 'LOW' : 
                      riskAnalysis.risk_score < 0.7 ? 'MEDIUM' : 'HIGH';
@@ -86,12 +95,9 @@ async function analyzePR(prData) {
 /**
  * Find similar high-quality PRs for reference
  */
-async function findSimilarQualityPRs(prData) {
-  const { title, body } = prData;
-  const prText = `${title || ''} ${body || ''}`;
-  
+async function findSimilarQualityPRs(prData, allSimilarPRs = null) {
   // Find similar PRs
-  const similarPRs = await findSimilarPRs(prText, 10);
+  const similarPRs = allSimilarPRs ? allSimilarPRs.slice(0, 10) : await findSimilarPRs(prData, 10);
   
   // Filter for high quality
   const highQuality = similarPRs.filter(pr => 
@@ -125,8 +131,8 @@ async function findSimilarQualityPRs(prData) {
 /**
  * Generate actionable improvement plan
  */
-async function generateImprovementPlan(prData) {
-  const suggestions = await getPRImprovementSuggestions(prData);
+async function generateImprovementPlan(prData, similarPRs = null) {
+  const suggestions = await getPRImprovementSuggestions(prData, similarPRs);
   
   // Group by severity
   const critical = suggestions.filter(s => s.severity === 'high');
@@ -185,12 +191,11 @@ async function generateImprovementPlan(prData) {
 /**
  * Compare with best practices from top companies
  */
-async function compareWithBestPractices(prData) {
+async function compareWithBestPractices(prData, allSimilarPRs = null) {
   const { title, body, additions, deletions, changed_files } = prData;
-  const prText = `${title || ''} ${body || ''}`;
   
   // Find similar PRs from top companies
-  const similarPRs = await findSimilarPRs(prText, 20);
+  const similarPRs = allSimilarPRs ? allSimilarPRs.slice(0, 20) : await findSimilarPRs(prData, 20);
   
   // Group by organization
   const byOrg = {};
@@ -249,13 +254,19 @@ async function compareWithBestPractices(prData) {
  * Comprehensive analysis combining all insights
  */
 async function comprehensiveAnalysis(prData) {
+  // Run the similarity search once (the widest limit any section uses) and
+  // share it, instead of every section loading and scoring the corpus again
+  const similarPRs = await findSimilarPRs(prData, 20);
+  
   const [analysis, similar, plan, comparison] = await Promise.all([
-    analyzePR(prData),
-    findSimilarQualityPRs(prData),
-    generateImprovementPlan(prData),
-    compareWithBestPractices(prData)
+    analyzePR(prData, similarPRs),
+    findSimilarQualityPRs(prData, similarPRs),
+    generateImprovementPlan(prData, similarPRs),
+    compareWithBestPractices(prData, similarPRs)
   ]);
   
+  const overallScore = calculateOverallScore(analysis, similar, plan);
+  
   return {
     agent: 'PR Quality Improver',
     action: 'comprehensive',
@@ -264,8 +275,8 @@ async function comprehensiveAnalysis(prData) {
       similar_prs: similar.result,
       improvement_plan: plan.result,
       industry_comparison: comparison.result,
-      overall_score: calculateOverallScore(analysis, similar, plan),
-      recommendation: generateFinalRecommendation(analysis, similar, plan)
+      overall_score: overallScore,
+      recommendation: generateFinalRecommendation(overallScore.score)
     },
     timestamp: new Date().toISOString()
   };
@@ -368,7 +379,7 @@ function calculateOverallScore(analysis, similar, plan) {
   
   return {
     score: Math.round(overall),
-    grade: overall >= 80 ? 'A' : overall >= 60 ? 'B' : overall >= 40 ? 'C' : 'D',
+    grade: getScoreBand(overall).grade,
     breakdown: {
       risk: Math.round(riskScore),
       similarity: Math.round(similarityScore),
@@ -377,18 +388,12 @@ function calculateOverallScore(analysis, similar, plan) {
   };
 }
 
-function generateFinalRecommendation(analysis, similar, plan) {
-  const score = calculateOverallScore(analysis, similar, plan).score;
-  
-  if (score >= 80) {
-    return '🎉 Excellent work! This PR meets high-quality standards. Ready for review.';
-  } else if (score >= 60) {
-    return '👍 Good PR! Address the key suggestions to reach top-tier quality.';
-  } else if (score >= 40) {
-    return '⚠️ Needs improvement. Follow the action plan to significantly enhance quality.';
-  } else {
-    return '🔴 Significant improvements required. Review the comprehensive suggestions carefully.';
-  }
+function generateFinalRecommendation(score) {
+  return getScoreBand(score).recommendation;
+}
+
+function getScoreBand(score) {
+  return SCORE_BANDS.find(band => score >= band.min);
 }
 
 export const handler = resolver.getDefinitions();
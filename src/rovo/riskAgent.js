@@ -14,12 +14,12 @@ class RiskAnalystAgent {
     try {
       console.log('[RiskAgent] Analyzing PR with real data:', prData.id);
       
-      // Get ML risk score from historical data
-      const riskAnalysis = await supabase.calculateMLRiskScore(prData);
-      
-      // Get similar PRs for context
+      // Get similar PRs for context; the risk score reuses the same search
       const similarPRs = await supabase.findSimilarPRsByText(prData.id, 10);
       
+      // Get ML risk score from historical data
+      const riskAnalysis = await supabase.calculateMLRiskScore(prData, similarPRs);
+      
       // Generate intelligent insights
       const insights = this.generateInsights(prData, riskAnalysis, similarPRs);
       
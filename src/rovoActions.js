@@ -2,14 +2,10 @@ import Resolver from '@forge/resolver';
 import { getPrRisks } from './storage';
 import { generateDryRunPreview } from './dryRunService';
 import { storeApprovalRequest, updateApprovalStatus } from './storage';
-import OpenAI from 'openai';
+import { getOpenAI } from './services/openaiClient.js';
 
 const resolver = new Resolver();
 
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
-});
-
 /**
  * Rovo Action: Explain Risk
  * Provides detailed explanation of a specific code risk
@@ -43,7 +39,7 @@ Provide:
 3. Best practices to avoid this in the future
 4. References to security standards (OWASP, CWE, etc.) if applicable`;
 
-    const response = await openai.chat.completions.create({
+    const response = await getOpenAI().chat.completions.create({
       model: 'gpt-4-turbo-preview',
       messages: [
         { role: 'system', content: 'You are a security expert educator.' },
@@ -116,7 +112,7 @@ EXPLANATION:
 ADDITIONAL MEASURES:
 [additional recommendations]`;
 
-    const response = await openai.chat.completions.create({
+    const response = await getOpenAI().chat.completions.create({
       model: 'gpt-4-turbo-preview',
       messages: [
         { role: 'system', content: 'You are a secure coding expert.' },
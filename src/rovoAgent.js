@@ -1,13 +1,9 @@
 import Resolver from '@forge/resolver';
 import { getPrRisks } from './storage';
-import OpenAI from 'openai';
+import { getOpenAI } from './services/openaiClient.js';
 
 const resolver = new Resolver();
 
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
-});
-
 /**
  * Rovo Agent handler for conversational risk exploration
  */
@@ -37,12 +33,13 @@ When discussing risks, always:
 
 Be concise but thorough. Use technical language when appropriate.`;
 
+    // Compact JSON: indentation only adds prompt tokens
     const userContext = prRisks.length > 0 
-      ? `\n\nCurrent PR Risks:\n${JSON.stringify(prRisks, null, 2)}`
+      ? `\n\nCurrent PR Risks:\n${JSON.stringify(prRisks)}`
       : '';
     
     // Call OpenAI
-    const response = await openai.chat.completions.create({
+    const response = await getOpenAI().chat.completions.create({
       model: 'gpt-4-turbo-preview',
       messages: [
         { role: 'system', content: systemPrompt },
@@ -187,11 +187,13 @@ async function fullWorkflow(input, autoExecute = false) {
 }
 
 /**
- * Batch processing for multiple changes
+ * Stream batch results as each change finishes
+ * 
+ * Keeps up to `concurrency` workflows in flight and yields
+ * `{ success, index, result | error }` in completion order, so callers can
+ * render or score early results without waiting for the slowest change.
  */
-async function processBatch(changes, options = {}) {
-  console.log(`processBatch: Processing ${changes.length} changes`);
-  
+async function* streamBatch(changes, options = {}) {
   const {
     autoExecute = false,
     createJiraTasks = false,
@@ -199,47 +201,69 @@ async function processBatch(changes, options = {}) {
     concurrency = 3
   } = options;
   
+  const runItem = async (change, index) => {
+    try {
+      const input = {
+        ...change,
+        create_jira_task: createJiraTasks,
+        post_pr_comment: postPRComments
+      };
+      
+      const result = await fullWorkflow(input, autoExecute);
+      return { success: true, index, result };
+    } catch (error) {
+      console.error(`Batch item ${index} failed:`, error);
+      return { 
+        success: false, 
+        index, 
+        error: error.message,
+        change
+      };
+    }
+  };
+  
+  // Pending workflows keyed by index, each resolving to [index, result]
+  const inFlight = new Map();
+  let next = 0;
+  
+  const launch = () => {
+    const index = next++;
+    inFlight.set(index, runItem(changes[index], index).then(r => [index, r]));
+  };
+  
+  while (next < changes.length && inFlight.size < concurrency) {
+    launch();
+  }
+  
+  while (inFlight.size > 0) {
+    const [index, itemResult] = await Promise.race(inFlight.values());
+    inFlight.delete(index);
+    if (next < changes.length) launch();
+    yield itemResult;
+  }
+}
+
+/**
+ * Batch processing for multiple changes
+ */
+async function processBatch(changes, options = {}) {
+  console.log(`processBatch: Processing ${changes.length} changes`);
+  
   const results = [];
   const errors = [];
   
-  // Process in chunks to avoid overwhelming the system
-  for (let i = 0; i < changes.length; i += concurrency) {
-    const chunk = changes.slice(i, i + concurrency);
-    
-    const chunkResults = await Promise.all(
-      chunk.map(async (change, idx) => {
-        try {
-          const input = {
-            ...change,
-            create_jira_task: createJiraTasks,
-            post_pr_comment: postPRComments
-          };
-          
-          const result = await fullWorkflow(input, autoExecute);
-          return { success: true, index: i + idx, result };
-        } catch (error) {
-          console.error(`Batch item ${i + idx} failed:`, error);
-          return { 
-            success: false, 
-            index: i + idx, 
-            error: error.message,
-            change
-          };
-        }
-      })
-    );
-    
-    chunkResults.forEach(r => {
-      if (r.success) {
-        results.push(r);
-      } else {
-        errors.push(r);
-      }
-    });
-    
-    console.log(`processBatch: Chunk ${Math.floor(i / concurrency) + 1} complete`);
+  for await (const r of streamBatch(changes, options)) {
+    if (r.success) {
+      results.push(r);
+    } else {
+      errors.push(r);
+    }
   }
   
+  // Report in input order regardless of completion order
+  results.sort((a, b) => a.index - b.index);
+  errors.sort((a, b) => a.index - b.index);
+  
   console.log(`processBatch: Complete - ${results.length} succeeded, ${errors.length} failed`);
   
   return { results, errors };
@@ -270,5 +294,6 @@ module.exports = {
   performFullAnalysis,
   executeAction,
   fullWorkflow,
+  streamBatch,
   processBatch
 };
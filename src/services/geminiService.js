@@ -12,27 +12,51 @@ const projectId = 'pitstop-ai-forge';
 const userId = '1bd4c817-2638-495d-be3a-4809b3e648ea'; // User provided UUID
 const batchMode = true;
 
-// Initialize ObservAI Client
+// PRs this small and low-risk get the static suggestions without a Gemini call
+const TRIVIAL_CHANGE_LINES = 10;
+const TRIVIAL_RISK_SCORE = 30;
+
+// ObservAI client, created on first remediation request so resolvers that
+// import this module but never call Gemini skip SDK setup
 let client = null;
-try {
-  if (apiKey) {
-    client = new ObservAIClient({
-      apiKey,
-      projectId,
-      userId,
-      trackingEndpoint,
-      batchMode // Efficient batch tracking
-    });
-    console.log('✅ ObservAI Client initialized');
+let clientInitialized = false;
+
+/**
+ * Get the ObservAI client, initializing it once on first use
+ */
+function getClient() {
+  if (!clientInitialized) {
+    clientInitialized = true;
+    try {
+      client = new ObservAIClient({
+        apiKey,
+        projectId,
+        userId,
+        trackingEndpoint,
+        batchMode // Efficient batch tracking
+      });
+      console.log('✅ ObservAI Client initialized');
+    } catch (e) {
+      console.error('Failed to initialize ObservAI client:', e);
+    }
   }
-} catch (e) {
-  console.error('Failed to initialize ObservAI client:', e);
+  return client;
 }
 
 /**
  * Generate AI-powered remediation suggestions
+ * `forceRefresh` always asks Gemini, even for trivial PRs
  */
-export async function generateRemediations(prData, riskAnalysis) {
+export async function generateRemediations(prData, riskAnalysis, { forceRefresh = false } = {}) {
+  if (!forceRefresh && isTrivialPR(prData, riskAnalysis)) {
+    console.log('⏭️  Trivial PR - skipping Gemini, using standard suggestions');
+    return {
+      success: true,
+      skippedAI: true, // Canned list; callers shouldn't cache it as AI output
+      suggestions: getFallbackSuggestions(riskAnalysis)
+    };
+  }
+
   console.log('🤖 Generating AI remediation suggestions (ObservAI)...');
 
   if (!apiKey) {
@@ -44,6 +68,7 @@ export async function generateRemediations(prData, riskAnalysis) {
     };
   }
 
+  const client = getClient();
   if (!client) {
     console.error('❌ ObservAI client not initialized');
     return {
@@ -118,6 +143,14 @@ export async function generateRemediations(prData, riskAnalysis) {
   }
 }
 
+/**
+ * Tiny, low-risk diffs (typo fixes etc.) where the model has nothing specific to add
+ */
+function isTrivialPR(prData, riskAnalysis) {
+  const changedLines = (prData.additions || 0) + (prData.deletions || 0);
+  return changedLines < TRIVIAL_CHANGE_LINES && riskAnalysis.risk_score < TRIVIAL_RISK_SCORE;
+}
+
 /**
  * Build context-aware prompt for Gemini
  */
@@ -179,17 +212,25 @@ function parseAISuggestions(aiText) {
     });
   }
 
-  // Fallback parsing if regex fails
+  // Fallback parsing if regex fails: walk lines only until 3 non-blank
+  // ones are found instead of splitting and filtering the whole response
   if (suggestions.length === 0) {
-    const lines = aiText.split('\n').filter(l => l.trim());
-    for (let i = 0; i < Math.min(3, lines.length); i++) {
-      suggestions.push({
-        step: i + 1,
-        action: lines[i],
-        timeEstimate: '15-30 minutes',
-        reasoning: 'Reduces overall PR risk',
-        source: 'gemini-ai-fallback'
-      });
+    let start = 0;
+    while (suggestions.length < 3 && start <= aiText.length) {
+      let end = aiText.indexOf('\n', start);
+      if (end === -1) end = aiText.length;
+      const line = aiText.slice(start, end);
+      start = end + 1;
+
+      if (line.trim()) {
+        suggestions.push({
+          step: suggestions.length + 1,
+          action: line,
+          timeEstimate: '15-30 minutes',
+          reasoning: 'Reduces overall PR risk',
+          source: 'gemini-ai-fallback'
+        });
+      }
     }
   }
 
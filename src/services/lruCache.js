@@ -0,0 +1,36 @@
+/**
+ * Small in-memory LRU cache
+ * Map keeps insertion order, so the first key is always the least recently used
+ */
+export class LRUCache {
+  constructor(maxSize) {
+    this.maxSize = maxSize;
+    this.entries = new Map();
+  }
+
+  /**
+   * Get a cached value (undefined on miss), marking it most recently used
+   */
+  get(key) {
+    const value = this.entries.get(key);
+    if (value !== undefined) {
+      this.entries.delete(key);
+      this.entries.set(key, value);
+    }
+    return value;
+  }
+
+  /**
+   * Cache a value, evicting the least recently used entry when full; returns the value
+   */
+  set(key, value) {
+    this.entries.delete(key);
+    this.entries.set(key, value);
+    if (this.entries.size > this.maxSize) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+    return value;
+  }
+}
+
+export default { LRUCache };
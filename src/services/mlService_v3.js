@@ -21,6 +21,37 @@
 
 import { storage } from '@forge/api';
 import * as supabaseService from './supabaseService.js';
+import { LRUCache } from './lruCache.js';
+
+// Patterns shared by every analysis, compiled once at module load
+const WORD_PATTERN = /\b\w{3,}\b/g;
+const DOC_FILE_PATTERN = /readme|\.md$|\.txt$|docs?\//i;
+const CRITICAL_FILE_PATTERN = /auth|login|api|security|config|db/i;
+const TESTING_KEYWORDS = ['test', 'coverage', 'unit', 'integration'];
+
+// Suggested PR description skeleton
+const DESCRIPTION_TEMPLATE = `## What & Why
+  [Explain the problem and solution]
+  
+## Changes Made
+  - [Key change 1]
+  - [Key change 2]
+  
+## Testing
+  - [How you tested this]
+  - [Test coverage: X%]
+  
+## Screenshots/Logs
+  [If UI/output changed]`;
+
+// The risky seed set doesn't depend on the PR being analyzed; reuse it for a while
+const SEED_RISKY_TTL_MS = 10 * 60 * 1000;
+let seedRiskyCache = null; // { prs, expiresAt }
+
+// Seed and team PRs are re-scored on every analysis; keep their TF-IDF vectors
+// in a small LRU so each text is tokenized once
+const TFIDF_MEMO_SIZE = 2048;
+const tfidfMemo = new LRUCache(TFIDF_MEMO_SIZE);
 
 // ============================================================================
 // SEED DATA ACCESS (Now via Supabase)
@@ -43,15 +74,24 @@ async function loadSeedQualityPRs(metrics) {
 }
 
 /**
- * Load seed risky PRs from Supabase
+ * Load seed risky PRs from Supabase (cached in memory for SEED_RISKY_TTL_MS)
  */
 async function loadSeedRiskyPRs() {
+  if (seedRiskyCache && Date.now() < seedRiskyCache.expiresAt) {
+    return seedRiskyCache.prs;
+  }
+
   try {
-    const prs = await supabaseService.getRiskyPatterns(10);
-    return prs.map(pr => ({
+    const prs = (await supabaseService.getRiskyPatterns(10)).map(pr => ({
       ...pr,
       quality_score: 0.2 // Known risky markers
     }));
+
+    // An empty result may be a swallowed Supabase error; don't pin it
+    if (prs.length > 0) {
+      seedRiskyCache = { prs, expiresAt: Date.now() + SEED_RISKY_TTL_MS };
+    }
+    return prs;
   } catch (error) {
     console.error('Error loading risky PRs:', error);
     return [];
@@ -83,6 +123,7 @@ async function getSeedStats() {
 
 /**
  * Store team PR for learning
+ * Returns the stored team PR count, or null if the write failed
  */
 async function storeTeamPR(prData) {
   try {
@@ -97,8 +138,10 @@ async function storeTeamPR(prData) {
     await storage.set('team_prs', trimmed);
 
     console.log(`✅ Stored team PR (total: ${trimmed.length})`);
+    return trimmed.length;
   } catch (error) {
     console.error('Error storing team PR:', error);
+    return null;
   }
 }
 
@@ -118,24 +161,68 @@ async function getTeamPRs() {
 // ============================================================================
 
 /**
- * Generate TF-IDF vector from text
+ * Generate TF-IDF vector from text (unit length, normalized in place)
  */
 function generateTFIDFVector(text) {
-  const words = text.toLowerCase().match(/\b\w{3,}\b/g) || [];
-  const freq = {};
-  words.forEach(w => freq[w] = (freq[w] || 0) + 1);
-
-  // Create 256-dim vector (smaller for performance)
-  const vector = new Array(256).fill(0);
-  Object.keys(freq).forEach(word => {
-    const hash = word.split('').reduce((acc, char) => acc + char.charCodeAt(0), 0);
-    const idx = hash % 256;
-    vector[idx] += freq[word] / words.length;
-  });
+  const words = text.toLowerCase().match(WORD_PATTERN) || [];
+
+  // Create 256-dim vector (smaller for performance); float32 halves the memo's
+  // footprint and is ample precision for unit-length similarity scores
+  // Term counts go straight into their buckets; dividing by the word count
+  // is dropped since normalization below rescales the vector anyway
+  const vector = new Float32Array(256);
+  for (const word of words) {
+    vector[hashWord(word) & 255] += 1;
+  }
 
   // Normalize
-  const norm = Math.sqrt(vector.reduce((sum, val) => sum + val * val, 0));
-  return vector.map(v => v / (norm || 1));
+  let sumSquares = 0;
+  for (let i = 0; i < vector.length; i++) {
+    sumSquares += vector[i] * vector[i];
+  }
+  const norm = Math.sqrt(sumSquares) || 1;
+  for (let i = 0; i < vector.length; i++) {
+    vector[i] /= norm;
+  }
+
+  return vector;
+}
+
+/**
+ * TF-IDF vector for text, served from the in-memory LRU when seen before
+ */
+function getTextVector(text) {
+  return tfidfMemo.get(text) || tfidfMemo.set(text, generateTFIDFVector(text));
+}
+
+/**
+ * 32-bit FNV-1a hash used to bucket words into the TF-IDF vector
+ * Same cost as summing char codes, but anagrams and similar words no longer
+ * pile into the same few buckets
+ */
+function hashWord(word) {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < word.length; i++) {
+    hash ^= word.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+}
+
+/**
+ * Insert row index i into a list of indices kept in descending score order and
+ * capped at k; ties keep the earlier row first, like a stable sort
+ */
+function insertTopIndex(top, i, scores, k) {
+  if (k <= 0) return;
+  if (top.length === k && scores[i] <= scores[top[k - 1]]) return;
+
+  let j = top.length < k ? top.length : k - 1;
+  while (j > 0 && scores[top[j - 1]] < scores[i]) {
+    top[j] = top[j - 1];
+    j--;
+  }
+  top[j] = i;
 }
 
 /**
@@ -168,31 +255,42 @@ async function findSimilarPRs(prData, limit = 10) {
     const seedRiskyPRs = await loadSeedRiskyPRs();
     const teamPRs = await getTeamPRs();
 
-    // Combine all PRs
-    const allPRs = [
-      ...seedQualityPRs.map(pr => ({ ...pr, source: 'seed_quality' })),
-      ...seedRiskyPRs.map(pr => ({ ...pr, source: 'seed_risky' })),
-      ...teamPRs.map(pr => ({ ...pr, source: 'team' }))
+    // Score PRs in place as parallel columns (row, source, similarity) rather than
+    // copying every row into a tagged object; only the top matches are materialized
+    const groups = [
+      { prs: seedQualityPRs, source: 'seed_quality' },
+      { prs: seedRiskyPRs, source: 'seed_risky' },
+      { prs: teamPRs, source: 'team' }
     ];
 
-    console.log(`📊 Analyzing against ${allPRs.length} PRs`);
+    // Every analysis stores a copy of the PR in team_prs; skip those so the
+    // PR never ranks as similar to itself
+    const rows = [];
+    const rowSources = [];
+    for (const { prs, source } of groups) {
+      for (const pr of prs) {
+        if (prData.id !== undefined && pr.id === prData.id) continue;
+        rows.push(pr);
+        rowSources.push(source);
+      }
+    }
 
-    // Calculate similarity for each
-    const withSimilarity = allPRs.map(pr => {
-      const prText = `${pr.title || ''} ${pr.body || ''}`;
-      const prVector = generateTFIDFVector(prText);
-      const similarity = cosineSimilarity(currentVector, prVector);
+    console.log(`📊 Analyzing against ${rows.length} PRs`);
 
-      return {
-        ...pr,
-        similarity
-      };
-    });
+    // Keep only the best `limit` row indices, best first, instead of sorting every row
+    const similarities = new Float64Array(rows.length);
+    const topIndices = [];
+    for (let i = 0; i < rows.length; i++) {
+      const prVector = getTextVector(`${rows[i].title || ''} ${rows[i].body || ''}`);
+      similarities[i] = cosineSimilarity(currentVector, prVector);
+      insertTopIndex(topIndices, i, similarities, limit);
+    }
 
-    // Sort by similarity and return top matches
-    const topMatches = withSimilarity
-      .sort((a, b) => b.similarity - a.similarity)
-      .slice(0, limit);
+    const topMatches = topIndices.map(i => ({
+      ...rows[i],
+      source: rowSources[i],
+      similarity: similarities[i]
+    }));
 
     console.log(`✅ Found ${topMatches.length} similar PRs`);
     console.log(`   Top match: ${topMatches[0]?.similarity.toFixed(2)} similarity`);
@@ -211,8 +309,9 @@ async function findSimilarPRs(prData, limit = 10) {
 
 /**
  * Calculate ML risk score using seed data + team learning
+ * Pass `similarPRs` (from findSimilarPRs, best first) to reuse an existing search
  */
-export async function calculateMLRiskScore(prData) {
+export async function calculateMLRiskScore(prData, similarPRs = null) {
   try {
     console.log('🧠 Calculating ML risk score with hybrid data...');
 
@@ -220,29 +319,36 @@ export async function calculateMLRiskScore(prData) {
     const prText = `${title || ''} ${body || ''}`;
     const totalChanges = (additions || 0) + (deletions || 0);
 
-    // Store for team learning
-    await storeTeamPR(prData);
+    // Store for team learning (keeps the count for the response)
+    const teamPRCount = await storeTeamPR(prData);
 
     // 1. Find similar PRs
-    const similarPRs = await findSimilarPRs(prData, 20);
+    similarPRs = similarPRs || await findSimilarPRs(prData, 20);
 
     if (similarPRs.length === 0) {
       console.log('⚠️  No similar PRs found, using baseline');
       return calculateBaselineRisk(prData);
     }
 
-    // 2. Separate quality vs risky
-    const qualityPRs = similarPRs.filter(pr =>
-      pr.source === 'seed_quality' ||
-      (pr.quality_score && pr.quality_score > 0.6)
-    );
+    // 2. Separate quality vs risky (counts, similarity sums and best match in one pass;
+    // similarPRs is sorted, so the first match in each group is the most similar)
+    let qualityCount = 0, qualitySimSum = 0, topQualitySim = 0;
+    let riskyCount = 0, riskySimSum = 0, topRiskySim = 0;
 
-    const riskyPRs = similarPRs.filter(pr =>
-      pr.source === 'seed_risky' ||
-      (pr.quality_score && pr.quality_score < 0.4)
-    );
+    for (const pr of similarPRs) {
+      if (pr.source === 'seed_quality' || (pr.quality_score && pr.quality_score > 0.6)) {
+        if (qualityCount === 0) topQualitySim = pr.similarity;
+        qualityCount++;
+        qualitySimSum += pr.similarity;
+      }
+      if (pr.source === 'seed_risky' || (pr.quality_score && pr.quality_score < 0.4)) {
+        if (riskyCount === 0) topRiskySim = pr.similarity;
+        riskyCount++;
+        riskySimSum += pr.similarity;
+      }
+    }
 
-    console.log(`📊 Analysis: ${qualityPRs.length} quality, ${riskyPRs.length} risky`);
+    console.log(`📊 Analysis: ${qualityCount} quality, ${riskyCount} risky`);
 
     // 3. Calculate similarity-weighted risk
     // DYNAMIC BASELINE: Adjust starting risk based on scale (don't penalize small PRs)
@@ -250,11 +356,16 @@ export async function calculateMLRiskScore(prData) {
     if (totalChanges < 50) riskScore = 0.15;
     if (totalChanges < 5) riskScore = 0.05;
 
+    // Classify changed files in one pass: all docs? any critical paths?
     const files = prData.files || [];
-    const isDocOnly = files.length > 0 && files.every(f => {
+    let isDocOnly = files.length > 0;
+    let hasCriticalFiles = false;
+    for (const f of files) {
       const path = f.path || f.filename || '';
-      return path.match(/readme|\.md$|\.txt$|docs?\//i);
-    });
+      if (isDocOnly && !DOC_FILE_PATTERN.test(path)) isDocOnly = false;
+      if (!hasCriticalFiles && CRITICAL_FILE_PATTERN.test(path)) hasCriticalFiles = true;
+      if (!isDocOnly && hasCriticalFiles) break;
+    }
 
     if (isDocOnly) {
       console.log('📄 PR detected as DOCUMENTATION ONLY (Discount applied)');
@@ -262,15 +373,15 @@ export async function calculateMLRiskScore(prData) {
     }
 
     // Similar to quality PRs → Lower risk
-    if (qualityPRs.length > 0) {
-      const avgQualitySim = qualityPRs.reduce((sum, pr) => sum + pr.similarity, 0) / qualityPRs.length;
+    if (qualityCount > 0) {
+      const avgQualitySim = qualitySimSum / qualityCount;
       riskScore -= avgQualitySim * (isDocOnly ? 0.1 : 0.3);
       console.log(`   ✅ Quality similarity: ${avgQualitySim.toFixed(2)} → -${(avgQualitySim * 0.3).toFixed(2)} risk`);
     }
 
     // Similar to risky PRs → Higher risk (less weight for doc PRs)
-    if (riskyPRs.length > 0) {
-      const avgRiskySim = riskyPRs.reduce((sum, pr) => sum + pr.similarity, 0) / riskyPRs.length;
+    if (riskyCount > 0) {
+      const avgRiskySim = riskySimSum / riskyCount;
       riskScore += avgRiskySim * (isDocOnly ? 0.05 : 0.3);
       console.log(`   ⚠️  Risky similarity: ${avgRiskySim.toFixed(2)} → +${(avgRiskySim * 0.3).toFixed(2)} risk`);
     }
@@ -298,11 +409,6 @@ export async function calculateMLRiskScore(prData) {
 
     // 6. HARD FLOORS: Apply critical structural protection at the very end
     const isNetDeletion = additions === 0 && deletions > 0;
-    const hasCriticalFiles = files.some(f => {
-      const path = (f.path || f.filename || '').toLowerCase();
-      return path.includes('auth') || path.includes('login') || path.includes('api') ||
-        path.includes('security') || path.includes('config') || path.includes('db');
-    });
 
     if (isNetDeletion && hasCriticalFiles) {
       console.log('🚨 CRITICAL STRUCTURAL RISK: Net deletion in critical file! (Enforcing 65% Floor)');
@@ -317,8 +423,8 @@ export async function calculateMLRiskScore(prData) {
     return {
       risk_score: riskScore,
       factors: {
-        similarity_to_quality: qualityPRs.length > 0 ? qualityPRs[0].similarity : 0,
-        similarity_to_risky: riskyPRs.length > 0 ? riskyPRs[0].similarity : 0,
+        similarity_to_quality: topQualitySim,
+        similarity_to_risky: topRiskySim,
         size_vs_benchmark: sizeRatio,
         files_vs_benchmark: filesRatio,
         title_quality: titleRatio
@@ -334,7 +440,7 @@ export async function calculateMLRiskScore(prData) {
       })),
       ml_model: 'tfidf_cosine_hybrid_v3',
       data_source: 'team_learning_plus_baseline',
-      team_prs_analyzed: (await getTeamPRs()).length
+      team_prs_analyzed: teamPRCount !== null ? teamPRCount : (await getTeamPRs()).length
     };
 
   } catch (error) {
@@ -374,8 +480,9 @@ function calculateBaselineRisk(prData) {
 
 /**
  * Get improvement suggestions based on seed data patterns
+ * Pass `similarPRs` (from findSimilarPRs, best first) to reuse an existing search
  */
-export async function getPRImprovementSuggestions(prData) {
+export async function getPRImprovementSuggestions(prData, similarPRs = null) {
   try {
     const { title, body, additions, deletions, changed_files, filesChanged } = prData;
     const totalChanges = (additions || 0) + (deletions || 0);
@@ -384,7 +491,7 @@ export async function getPRImprovementSuggestions(prData) {
     const seedStats = await getSeedStats();
 
     // Find similar quality PRs first for contextual examples
-    const similar = await findSimilarPRs(prData, 10);
+    const similar = similarPRs ? similarPRs.slice(0, 10) : await findSimilarPRs(prData, 10);
     const qualityExamples = similar.filter(pr => pr.source === 'seed_quality').slice(0, 3);
     const riskyExamples = similar.filter(pr => pr.source === 'seed_risky').slice(0, 2);
 
@@ -419,20 +526,6 @@ export async function getPRImprovementSuggestions(prData) {
     // 2. Description Quality - Provide template
     if (!body || body.length < 50) {
       const goodDescExample = qualityExamples.find(pr => pr.body && pr.body.length > 100);
-      const descTemplate = `## What & Why
-  [Explain the problem and solution]
-  
-## Changes Made
-  - [Key change 1]
-  - [Key change 2]
-  
-## Testing
-  - [How you tested this]
-  - [Test coverage: X%]
-  
-## Screenshots/Logs
-  [If UI/output changed]`;
-
       suggestions.push({
         category: '📋 Description',
         severity: 'high',
@@ -440,9 +533,9 @@ export async function getPRImprovementSuggestions(prData) {
         current: `Missing PR description (${body?.length || 0} chars)`,
         suggestion: goodDescExample
           ? `Add a detailed description like ${goodDescExample.organization} does (${goodDescExample.body.length} chars). Include: context, changes, testing.`
-          : `Quality PRs include: Why? What changed? How was it tested? Use this template:\n\n${descTemplate}`,
+          : `Quality PRs include: Why? What changed? How was it tested? Use this template:\n\n${DESCRIPTION_TEMPLATE}`,
         action: '📝 Add structured description using template',
-        example: descTemplate,
+        example: DESCRIPTION_TEMPLATE,
         reference: goodDescExample?.organization || 'apache_standard'
       });
     } else if (body.length < 150) {
@@ -544,12 +637,8 @@ export async function getPRImprovementSuggestions(prData) {
     }
 
     // 7. Testing Reminder
-    const hasTestKeywords = body && (
-      body.toLowerCase().includes('test') ||
-      body.toLowerCase().includes('coverage') ||
-      body.toLowerCase().includes('unit') ||
-      body.toLowerCase().includes('integration')
-    );
+    const bodyLower = body ? body.toLowerCase() : '';
+    const hasTestKeywords = TESTING_KEYWORDS.some(kw => bodyLower.includes(kw));
 
     if (!hasTestKeywords && totalChanges > 50) {
       suggestions.push({
@@ -579,6 +668,9 @@ export async function getPRImprovementSuggestions(prData) {
   }
 }
 
+// Internal helpers, exported for tests
+export { generateTFIDFVector, getTextVector, hashWord, insertTopIndex };
+
 export default {
   calculateMLRiskScore,
   getPRImprovementSuggestions,
@@ -0,0 +1,25 @@
+import OpenAI from 'openai';
+
+/**
+ * Shared OpenAI client
+ * One instance per runtime, created on first use, so every module
+ * reuses the same connection pool and retry settings
+ */
+
+let client = null;
+
+/**
+ * Get the shared OpenAI client (API key from Forge environment variables)
+ */
+export function getOpenAI() {
+  if (!client) {
+    client = new OpenAI({
+      apiKey: process.env.OPENAI_API_KEY,
+      maxRetries: 5, // SDK backs off with jitter and honors Retry-After on 429/5xx
+      timeout: 60000
+    });
+  }
+  return client;
+}
+
+export default { getOpenAI };
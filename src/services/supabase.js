@@ -8,6 +8,13 @@ import { fetch } from '@forge/api';
 const SUPABASE_URL = process.env.SUPABASE_URL;
 const SUPABASE_KEY = process.env.SUPABASE_KEY;
 
+// PostgREST's default cap on rows per response (db-max-rows); keep this at or
+// below the server's setting, see queryAllPages
+const SUPABASE_MAX_ROWS = 1000;
+
+// Critical file-path keywords as a single case-insensitive alternation
+const CRITICAL_FILE_PATTERN = /auth|security|payment|config|database|api|admin/i;
+
 // Helper: Execute Supabase REST API query
 async function query(endpoint, options = {}) {
   const url = `${SUPABASE_URL}/rest/v1/${endpoint}`;
@@ -30,16 +37,38 @@ async function query(endpoint, options = {}) {
     throw new Error(`Supabase error: ${response.status}`);
   }
 
-  const data = await response.json();
+  // Writes sent with 'Prefer: return=minimal' come back with no body
+  // (201 for inserts, 204 for updates/deletes), so check the body itself
+  const text = await response.text();
+  if (!text) return [];
+  
+  const data = JSON.parse(text);
   return Array.isArray(data) ? data : [data];
 }
 
 /**
- * Get ALL PRs from database with full details
+ * Run a GET query page by page until a short page comes back
+ * `endpoint` must order by a unique key (or end with one as a tie-breaker) so
+ * pages don't overlap or skip rows. `pageSize` must not exceed the server's
+ * max-rows: a capped page would look short and end paging early
  */
-export async function getAllPRs(limit = 100) {
+async function queryAllPages(endpoint, pageSize = SUPABASE_MAX_ROWS) {
+  const rows = [];
+  let page;
+  do {
+    page = await query(`${endpoint}&limit=${pageSize}&offset=${rows.length}`);
+    rows.push(...page);
+  } while (page.length === pageSize);
+  
+  return rows;
+}
+
+/**
+ * Get ALL PRs from database with full details, or only `columns` when given
+ */
+export async function getAllPRs(limit = 100, columns = '*') {
   try {
-    return await query(`prs?select=*&limit=${limit}&order=created_at.desc`);
+    return await query(`prs?select=${columns}&limit=${limit}&order=created_at.desc`);
   } catch (error) {
     console.error('Error fetching PRs:', error);
     return [];
@@ -72,23 +101,44 @@ export async function getPREmbeddings(prId) {
 }
 
 /**
- * Calculate cosine similarity between two vectors
+ * Get embeddings for many PRs in a few bulk requests, grouped by pr_id
+ * PRs carry dozens of chunk embeddings each, so ids go out in small groups
+ * and each group is paged past PostgREST's row cap instead of being truncated
+ */
+async function getEmbeddingsForPRs(prIds, chunkSize = 10) {
+  const chunks = [];
+  for (let i = 0; i < prIds.length; i += chunkSize) {
+    chunks.push(prIds.slice(i, i + chunkSize));
+  }
+  
+  const results = await Promise.all(chunks.map(ids =>
+    queryAllPages(`embeddings?pr_id=in.(${ids.join(',')})&select=pr_id,embedding,embed_dim&order=pr_id,id`)
+  ));
+  
+  const byPR = new Map();
+  for (const rows of results) {
+    for (const row of rows) {
+      if (!byPR.has(row.pr_id)) byPR.set(row.pr_id, []);
+      byPR.get(row.pr_id).push(row);
+    }
+  }
+  
+  return byPR;
+}
+
+/**
+ * Cosine similarity of two unit-length vectors (as returned by averageEmbeddings),
+ * which reduces to their dot product
  */
 function cosineSimilarity(vec1, vec2) {
   if (!vec1 || !vec2 || vec1.length !== vec2.length) return 0;
   
   let dotProduct = 0;
-  let norm1 = 0;
-  let norm2 = 0;
-  
   for (let i = 0; i < vec1.length; i++) {
     dotProduct += vec1[i] * vec2[i];
-    norm1 += vec1[i] * vec1[i];
-    norm2 += vec2[i] * vec2[i];
   }
   
-  if (norm1 === 0 || norm2 === 0) return 0;
-  return dotProduct / (Math.sqrt(norm1) * Math.sqrt(norm2));
+  return dotProduct;
 }
 
 /**
@@ -97,42 +147,39 @@ function cosineSimilarity(vec1, vec2) {
  */
 export async function findSimilarPRsByEmbedding(targetPrId, limit = 5) {
   try {
-    // Get the target PR's embeddings
+    // Get the target PR's embeddings and average them; rows without a
+    // vector leave nothing to average, same as having no embeddings
     const targetEmbeddings = await getPREmbeddings(targetPrId);
+    const targetVector = averageEmbeddings(targetEmbeddings);
     
-    if (!targetEmbeddings || targetEmbeddings.length === 0) {
+    if (!targetVector) {
       console.log('No embeddings found for target PR, falling back to text search');
       return await findSimilarPRsByText(targetPrId, limit);
     }
     
-    // Average the embeddings for the target PR
-    const targetVector = averageEmbeddings(targetEmbeddings);
-    
     // Get all PRs (we'll need to fetch embeddings for comparison)
     // In production, you'd use pgvector extension for efficient similarity search
     const allPRs = await getAllPRs(200); // Get top 200 recent PRs
     
-    const similarities = [];
+    const candidates = allPRs.filter(pr => pr.id !== targetPrId); // Skip self
+    const embeddingsByPR = await getEmbeddingsForPRs(candidates.map(pr => pr.id));
     
-    for (const pr of allPRs) {
-      if (pr.id === targetPrId) continue; // Skip self
-      
-      const prEmbeddings = await getPREmbeddings(pr.id);
-      if (!prEmbeddings || prEmbeddings.length === 0) continue;
+    // Keep only the best `limit` matches, sorted, instead of sorting every candidate
+    const topMatches = [];
+    // Candidate vectors are only needed for one comparison, so share one buffer
+    const scratch = new Float32Array(targetVector.length);
+    
+    for (const pr of candidates) {
+      const prEmbeddings = embeddingsByPR.get(pr.id);
+      if (!prEmbeddings) continue;
       
-      const prVector = averageEmbeddings(prEmbeddings);
+      const prVector = averageEmbeddings(prEmbeddings, scratch);
       const similarity = cosineSimilarity(targetVector, prVector);
       
-      similarities.push({
-        pr,
-        similarity,
-      });
+      insertTopK(topMatches, { pr, similarity }, limit);
     }
     
-    // Sort by similarity and return top results
-    similarities.sort((a, b) => b.similarity - a.similarity);
-    
-    return similarities.slice(0, limit).map(s => ({
+    return topMatches.map(s => ({
       ...s.pr,
       similarity_score: s.similarity,
     }));
@@ -144,25 +191,65 @@ export async function findSimilarPRsByEmbedding(targetPrId, limit = 5) {
 }
 
 /**
- * Average multiple embedding vectors
+ * Insert into a descending-by-similarity list capped at k entries
+ */
+function insertTopK(top, item, k) {
+  if (k <= 0) return;
+  if (top.length === k && item.similarity <= top[k - 1].similarity) return;
+  
+  let i = top.length < k ? top.length : k - 1;
+  while (i > 0 && top[i - 1].similarity < item.similarity) {
+    top[i] = top[i - 1];
+    i--;
+  }
+  top[i] = item;
+}
+
+/**
+ * Average multiple embedding vectors, returned L2-normalized (unit length)
+ * Pass `out` to reuse a buffer of the right dimension instead of allocating one
  */
-function averageEmbeddings(embeddings) {
+function averageEmbeddings(embeddings, out = null) {
   if (!embeddings || embeddings.length === 0) return null;
   
   const dim = embeddings[0].embed_dim || 768;
-  const avgVector = new Array(dim).fill(0);
+  const avgVector = out && out.length === dim ? out.fill(0) : new Float32Array(dim);
+  let count = 0;
   
   for (const emb of embeddings) {
-    const vector = emb.embedding;
+    const vector = parseVector(emb.embedding);
     if (!vector) continue;
     
-    for (let i = 0; i < Math.min(vector.length, dim); i++) {
+    const n = Math.min(vector.length, dim);
+    for (let i = 0; i < n; i++) {
       avgVector[i] += vector[i];
     }
+    count++;
   }
   
-  const count = embeddings.length;
-  return avgVector.map(v => v / count);
+  if (count === 0) return null;
+  
+  // Normalizing the sum gives the same unit vector as normalizing the mean,
+  // so the divide-by-count pass folds into a single scale by 1/||sum||
+  let sumSq = 0;
+  for (let i = 0; i < dim; i++) {
+    sumSq += avgVector[i] * avgVector[i];
+  }
+  if (sumSq === 0) return avgVector;
+  
+  const scale = 1 / Math.sqrt(sumSq);
+  for (let i = 0; i < dim; i++) {
+    avgVector[i] *= scale;
+  }
+  
+  return avgVector;
+}
+
+/**
+ * PostgREST returns pgvector columns as text literals ('[0.1,0.2,...]')
+ */
+function parseVector(value) {
+  return typeof value === 'string' ? JSON.parse(value) : value;
 }
 
 /**
@@ -182,22 +269,23 @@ export async function findSimilarPRsByText(targetPrId, limit = 5) {
       `prs?select=*&additions.gte.0&limit=50&order=created_at.desc`
     );
     
-    // Score based on similarity
-    const scored = similar
-      .filter(pr => pr.id !== targetPrId)
-      .map(pr => {
-        const prSize = (pr.additions || 0) + (pr.deletions || 0);
-        const sizeScore = 1 - Math.abs(prSize - changeSize) / Math.max(prSize, changeSize, 1);
-        const fileScore = 1 - Math.abs((pr.changed_files || 0) - (targetPR.changed_files || 0)) / Math.max(pr.changed_files || 1, targetPR.changed_files || 1, 1);
-        
-        return {
-          ...pr,
-          similarity_score: (sizeScore * 0.6 + fileScore * 0.4),
-        };
-      })
-      .sort((a, b) => b.similarity_score - a.similarity_score);
+    // Score based on similarity; only the top `limit` rows are copied into results
+    const topMatches = [];
+    
+    for (const pr of similar) {
+      if (pr.id === targetPrId) continue;
+      
+      const prSize = (pr.additions || 0) + (pr.deletions || 0);
+      const sizeScore = 1 - Math.abs(prSize - changeSize) / Math.max(prSize, changeSize, 1);
+      const fileScore = 1 - Math.abs((pr.changed_files || 0) - (targetPR.changed_files || 0)) / Math.max(pr.changed_files || 1, targetPR.changed_files || 1, 1);
+      
+      insertTopK(topMatches, { pr, similarity: sizeScore * 0.6 + fileScore * 0.4 }, limit);
+    }
     
-    return scored.slice(0, limit);
+    return topMatches.map(s => ({
+      ...s.pr,
+      similarity_score: s.similarity,
+    }));
   } catch (error) {
     console.error('Error in text similarity search:', error);
     return [];
@@ -207,11 +295,17 @@ export async function findSimilarPRsByText(targetPrId, limit = 5) {
 /**
  * Calculate ML-based risk score using historical data
  * Production-grade algorithm with real statistics
+ * Pass `similarPRs` (from findSimilarPRsByText) to reuse an existing search
  */
-export async function calculateMLRiskScore(prData) {
+export async function calculateMLRiskScore(prData, similarPRs = null) {
   try {
     // Get statistical distribution from database
-    const allPRs = await getAllPRs(1000); // Sample 1000 recent PRs
+    // Sample 1000 recent PRs; percentiles only need the size columns.
+    // The similar-PR search is independent, so run both requests at once
+    const [allPRs, similar] = await Promise.all([
+      getAllPRs(1000, 'additions,deletions,changed_files'),
+      similarPRs || findSimilarPRsByText(prData.id, 10),
+    ]);
     
     if (!allPRs || allPRs.length === 0) {
       return { risk_score: 0.5, factors: {}, confidence: 0 };
@@ -223,9 +317,8 @@ export async function calculateMLRiskScore(prData) {
     const totalChanges = additions + deletions;
     
     // Calculate percentiles
-    const additionsPercentile = calculatePercentile(allPRs.map(p => p.additions || 0), additions);
-    const deletionsPercentile = calculatePercentile(allPRs.map(p => p.deletions || 0), deletions);
-    const filesPercentile = calculatePercentile(allPRs.map(p => p.changed_files || 0), changedFiles);
+    const { additionsPercentile, deletionsPercentile, filesPercentile } =
+      calculatePercentiles(allPRs, additions, deletions, changedFiles);
     
     // Complexity: ratio of deletions to total changes (higher = more refactoring)
     const deletionRatio = totalChanges > 0 ? deletions / totalChanges : 0;
@@ -238,9 +331,8 @@ export async function calculateMLRiskScore(prData) {
     const fileRiskScore = filesPercentile;
     
     // Historical risk: Find similar PRs and check their outcomes
-    const similarPRs = await findSimilarPRsByText(prData.id, 10);
-    const historicalScore = similarPRs.length > 0 
-      ? similarPRs.reduce((sum, pr) => sum + (pr.similarity_score || 0.5), 0) / similarPRs.length
+    const historicalScore = similar.length > 0 
+      ? similar.reduce((sum, pr) => sum + (pr.similarity_score || 0.5), 0) / similar.length
       : 0.5;
     
     // Weighted risk score
@@ -266,7 +358,7 @@ export async function calculateMLRiskScore(prData) {
         additionsPercentile,
         deletionsPercentile,
         filesPercentile,
-        similarPRsFound: similarPRs.length,
+        similarPRsFound: similar.length,
       },
     };
     
@@ -281,15 +373,26 @@ export async function calculateMLRiskScore(prData) {
 }
 
 /**
- * Calculate percentile rank
+ * Percentile ranks of a PR's additions, deletions and file count
+ * A rank is just the share of rows at or below the target, so count all
+ * three in one pass over the rows instead of sorting a copy per column
  */
-function calculatePercentile(values, target) {
-  if (!values || values.length === 0) return 0.5;
+function calculatePercentiles(rows, additions, deletions, changedFiles) {
+  let additionsBelow = 0;
+  let deletionsBelow = 0;
+  let filesBelow = 0;
   
-  const sorted = [...values].sort((a, b) => a - b);
-  const below = sorted.filter(v => v <= target).length;
+  for (const row of rows) {
+    if ((row.additions || 0) <= additions) additionsBelow++;
+    if ((row.deletions || 0) <= deletions) deletionsBelow++;
+    if ((row.changed_files || 0) <= changedFiles) filesBelow++;
+  }
   
-  return below / sorted.length;
+  return {
+    additionsPercentile: additionsBelow / rows.length,
+    deletionsPercentile: deletionsBelow / rows.length,
+    filesPercentile: filesBelow / rows.length,
+  };
 }
 
 /**
@@ -329,8 +432,7 @@ export async function getFileRiskAnalysis(prId) {
       // Risk factors: more chunks = more changes, critical files = higher risk
       const chunkScore = Math.min(file.chunks / 10, 1);
       const sectionScore = Math.min(file.sections.size / 5, 1);
-      const criticalPatterns = ['auth', 'security', 'payment', 'config', 'database', 'api', 'admin'];
-      const isCritical = criticalPatterns.some(p => file.filename.toLowerCase().includes(p));
+      const isCritical = CRITICAL_FILE_PATTERN.test(file.filename);
       
       file.risk_score = (chunkScore * 0.4 + sectionScore * 0.3 + (isCritical ? 0.3 : 0));
       file.changes = file.total_lines;
@@ -358,7 +460,7 @@ export async function generateAISuggestions(prData, factors) {
     // Analyze patterns and generate context-aware suggestions
     
     if (factors.changeSize > 0.7) {
-      const allPRs = await getAllPRs(500);
+      const allPRs = await getAllPRs(500, 'additions,deletions');
       const largePRs = allPRs.filter(p => (p.additions + p.deletions) > 300);
       
       suggestions.push({
@@ -433,6 +535,7 @@ export async function storePRMetrics(prId, riskScore, factors, extra = {}) {
   try {
     await query('pr_metrics', {
       method: 'POST',
+      headers: { 'Prefer': 'return=minimal' }, // Result unused; skip echoing the row back
       body: {
         pr_id: prId,
         risk_score: riskScore,
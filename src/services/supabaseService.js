@@ -8,7 +8,17 @@ if (!supabaseUrl || !supabaseKey) {
     console.warn('⚠️ Supabase credentials missing. ML benchmarking will be disabled.');
 }
 
-export const supabase = createClient(supabaseUrl, supabaseKey);
+let supabase = null;
+
+/**
+ * Supabase client, created on first use so importing this module stays cheap
+ */
+export function getSupabase() {
+    if (!supabase) {
+        supabase = createClient(supabaseUrl, supabaseKey);
+    }
+    return supabase;
+}
 
 /**
  * Fetch top matching quality PRs from industry benchmark
@@ -20,7 +30,7 @@ export async function getBenchmarkPRs(metrics, limit = 10) {
         const changed_files = Number(metrics.changed_files) || 0;
 
         // Find PRs with similar scale (+/- 50% lines)
-        const { data, error } = await supabase
+        const { data, error } = await getSupabase()
             .from('prs')
             .select('*, projects(owner, repo)')
             .gte('additions', Math.round(additions * 0.5))
@@ -44,7 +54,7 @@ export async function getBenchmarkPRs(metrics, limit = 10) {
 export async function getRiskyPatterns(limit = 5) {
     try {
         // In a real scenario, we might query by labels or past metrics
-        const { data, error } = await supabase
+        const { data, error } = await getSupabase()
             .from('prs')
             .select('*')
             .not('title', 'is', null)
@@ -5,6 +5,8 @@ import { storage } from '@forge/api';
  * Aggregates PR risk data for team-level insights
  */
 
+const DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
+
 /**
  * Record PR analysis for team metrics
  */
@@ -49,11 +51,34 @@ export async function getTeamMetrics() {
     return metrics || [];
 }
 
+/**
+ * Metrics recorded in the last `days` days
+ * Metrics are appended in time order, so binary search for the first recent
+ * entry and slice instead of testing every timestamp
+ */
+export function getRecentMetrics(metrics, days) {
+    const cutoff = Date.now() - (days * 24 * 60 * 60 * 1000);
+
+    let lo = 0;
+    let hi = metrics.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >>> 1;
+        if (metrics[mid].timestamp > cutoff) {
+            hi = mid;
+        } else {
+            lo = mid + 1;
+        }
+    }
+
+    return metrics.slice(lo);
+}
+
 /**
  * Calculate team health score (0-100)
+ * Pass preloaded metrics to skip the storage read
  */
-export async function calculateTeamHealth() {
-    const metrics = await getTeamMetrics();
+export async function calculateTeamHealth(preloaded = null) {
+    const metrics = preloaded || await getTeamMetrics();
 
     if (metrics.length === 0) {
         return {
@@ -67,8 +92,7 @@ export async function calculateTeamHealth() {
     }
 
     // Last 7 days
-    const sevenDaysAgo = Date.now() - (7 * 24 * 60 * 60 * 1000);
-    const recentMetrics = metrics.filter(m => m.timestamp > sevenDaysAgo);
+    const recentMetrics = getRecentMetrics(metrics, 7);
 
     if (recentMetrics.length === 0) {
         return {
@@ -109,10 +133,9 @@ export async function calculateTeamHealth() {
 /**
  * Get hot zones (files/components with highest risk)
  */
-export async function getHotZones() {
-    const metrics = await getTeamMetrics();
-    const sevenDaysAgo = Date.now() - (7 * 24 * 60 * 60 * 1000);
-    const recentMetrics = metrics.filter(m => m.timestamp > sevenDaysAgo);
+export async function getHotZones(preloaded = null) {
+    const metrics = preloaded || await getTeamMetrics();
+    const recentMetrics = getRecentMetrics(metrics, 7);
 
     if (recentMetrics.length === 0) {
         return [];
@@ -153,10 +176,9 @@ export async function getHotZones() {
 /**
  * Get risky time windows
  */
-export async function getRiskyTimeWindows() {
-    const metrics = await getTeamMetrics();
-    const sevenDaysAgo = Date.now() - (7 * 24 * 60 * 60 * 1000);
-    const recentMetrics = metrics.filter(m => m.timestamp > sevenDaysAgo);
+export async function getRiskyTimeWindows(preloaded = null) {
+    const metrics = preloaded || await getTeamMetrics();
+    const recentMetrics = getRecentMetrics(metrics, 7);
 
     if (recentMetrics.length === 0) {
         return {
@@ -165,53 +187,43 @@ export async function getRiskyTimeWindows() {
         };
     }
 
-    // Aggregate by day of week and hour
-    const timeWindows = {
-        byDay: {},
-        byHour: {}
-    };
-
-    const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
-
-    recentMetrics.forEach(metric => {
-        const day = days[metric.dayOfWeek];
-        const hour = metric.hourOfDay;
-
-        if (!timeWindows.byDay[day]) {
-            timeWindows.byDay[day] = { count: 0, totalRisk: 0 };
-        }
-        if (!timeWindows.byHour[hour]) {
-            timeWindows.byHour[hour] = { count: 0, totalRisk: 0 };
-        }
-
-        timeWindows.byDay[day].count++;
-        timeWindows.byDay[day].totalRisk += metric.riskScore;
-        timeWindows.byHour[hour].count++;
-        timeWindows.byHour[hour].totalRisk += metric.riskScore;
-    });
+    // Aggregate by day of week and hour into fixed slots (0-6, 0-23)
+    const dayCount = new Uint32Array(7);
+    const dayRisk = new Float64Array(7);
+    const hourCount = new Uint32Array(24);
+    const hourRisk = new Float64Array(24);
+
+    for (const metric of recentMetrics) {
+        dayCount[metric.dayOfWeek]++;
+        dayRisk[metric.dayOfWeek] += metric.riskScore;
+        hourCount[metric.hourOfDay]++;
+        hourRisk[metric.hourOfDay] += metric.riskScore;
+    }
 
     // Find riskiest day and hour
     let riskiestDay = null;
     let maxDayRisk = 0;
 
-    Object.entries(timeWindows.byDay).forEach(([day, data]) => {
-        const avgRisk = data.totalRisk / data.count;
+    for (let day = 0; day < 7; day++) {
+        if (dayCount[day] === 0) continue;
+        const avgRisk = dayRisk[day] / dayCount[day];
         if (avgRisk > maxDayRisk) {
             maxDayRisk = avgRisk;
-            riskiestDay = day;
+            riskiestDay = DAY_NAMES[day];
         }
-    });
+    }
 
     let riskiestHour = null;
     let maxHourRisk = 0;
 
-    Object.entries(timeWindows.byHour).forEach(([hour, data]) => {
-        const avgRisk = data.totalRisk / data.count;
+    for (let hour = 0; hour < 24; hour++) {
+        if (hourCount[hour] === 0) continue;
+        const avgRisk = hourRisk[hour] / hourCount[hour];
         if (avgRisk > maxHourRisk) {
             maxHourRisk = avgRisk;
-            riskiestHour = hour;
+            riskiestHour = String(hour);
         }
-    });
+    }
 
     return {
         riskiestDay: { day: riskiestDay || 'N/A', avgRisk: Math.round(maxDayRisk) },
@@ -222,6 +234,7 @@ export async function getRiskyTimeWindows() {
 export default {
     recordPRMetric,
     getTeamMetrics,
+    getRecentMetrics,
     calculateTeamHealth,
     getHotZones,
     getRiskyTimeWindows
@@ -28,13 +28,17 @@ export async function getPrRisks(prId) {
 export async function storeApprovalRequest(request) {
   const approvalId = `approval-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
   
-  await storage.set(approvalId, {
-    ...request,
-    createdAt: new Date().toISOString()
-  });
+  // Write the request and read the pending list concurrently
+  const [, storedList] = await Promise.all([
+    storage.set(approvalId, {
+      ...request,
+      createdAt: new Date().toISOString()
+    }),
+    storage.get('pending-approvals')
+  ]);
   
   // Also add to pending approvals list
-  const pendingList = await storage.get('pending-approvals') || [];
+  const pendingList = storedList || [];
   pendingList.push(approvalId);
   await storage.set('pending-approvals', pendingList);
   
@@ -77,14 +81,16 @@ export async function updateApprovalStatus(approvalId, status, userId) {
  */
 export async function getPendingApprovals() {
   const pendingList = await storage.get('pending-approvals') || [];
+  
+  // Fetch all approvals concurrently instead of one round-trip at a time
+  const stored = await Promise.all(pendingList.map(approvalId => storage.get(approvalId)));
   const approvals = [];
   
-  for (const approvalId of pendingList) {
-    const approval = await storage.get(approvalId);
+  stored.forEach((approval, i) => {
     if (approval) {
-      approvals.push({ id: approvalId, ...approval });
+      approvals.push({ id: pendingList[i], ...approval });
     }
-  }
+  });
   
   return approvals;
 }
@@ -1,15 +1,34 @@
 import { createClient } from '@supabase/supabase-js';
-import OpenAI from 'openai';
+import { getOpenAI } from './services/openaiClient.js';
+import { storage } from '@forge/api';
+import { createHash } from 'crypto';
+import { LRUCache } from './services/lruCache.js';
 
-// Initialize clients
-const supabase = createClient(
-  process.env.SUPABASE_URL,
-  process.env.SUPABASE_KEY
-);
+// Client is created on first use so importing this module stays cheap
+let supabase = null;
 
-const openai = new OpenAI({
-  apiKey: process.env.OPENAI_API_KEY
-});
+function getSupabase() {
+  if (!supabase) {
+    supabase = createClient(
+      process.env.SUPABASE_URL,
+      process.env.SUPABASE_KEY
+    );
+  }
+  return supabase;
+}
+
+const EMBEDDING_MODEL = 'text-embedding-3-small';
+const EMBEDDING_BATCH_SIZE = 64; // Inputs per embeddings request
+const EMBEDDING_CONCURRENCY = 4; // Embeddings requests in flight at once
+const EMBEDDING_BATCH_CHAR_BUDGET = 400000; // ~100k tokens per request, well under the API cap
+const EMBEDDING_MEMO_SIZE = 1024; // Recent embeddings kept in memory ahead of Forge storage
+const EMBEDDING_CACHE_SLOTS = 512; // Forge storage keys the embedding cache may use (~8 KB each)
+
+// Fixed part of every match_risks call; only the query vector and options vary
+const MATCH_RISKS_PARAMS = Object.freeze({ match_threshold: 0.7 });
+
+// In-process LRU in front of the Forge storage cache
+const embeddingMemo = new LRUCache(EMBEDDING_MEMO_SIZE);
 
 /**
  * Store risk embedding in Supabase for vector search
@@ -17,12 +36,10 @@ const openai = new OpenAI({
 export async function storeRiskEmbedding(risk, prContext) {
   try {
     // Generate embedding for risk
-    const embedding = await generateEmbedding(
-      `${risk.name} ${risk.description} ${risk.snippet}`
-    );
+    const embedding = await generateEmbedding(getRiskText(risk));
     
     // Store in Supabase
-    const { data, error } = await supabase
+    const { data, error } = await getSupabase()
       .from('risk_embeddings')
       .insert({
         risk_id: risk.id,
@@ -31,7 +48,8 @@ export async function storeRiskEmbedding(risk, prContext) {
         risk_type: risk.type,
         severity: risk.severity,
         category: risk.category,
-        embedding,
+        content_hash: getRiskContentHash(risk),
+        embedding: toPgVector(embedding),
         metadata: {
           name: risk.name,
           description: risk.description,
@@ -52,20 +70,88 @@ export async function storeRiskEmbedding(risk, prContext) {
 }
 
 /**
- * Search for similar past risks using vector similarity
+ * Store embeddings for all risks of a PR using batched embedding requests
+ */
+export async function storeRiskEmbeddings(risks, prContext, options = {}) {
+  if (!risks || risks.length === 0) return [];
+  
+  try {
+    // Skip risks already indexed for this PR (e.g. re-runs on the same commit)
+    // with one lookup, unless the caller forces a re-index. Risk ids are
+    // positional, so match on a hash of the risk's content instead
+    let contentHashes = risks.map(getRiskContentHash);
+    if (!options.force) {
+      const { data: existing, error: lookupError } = await getSupabase()
+        .from('risk_embeddings')
+        .select('content_hash')
+        .eq('pr_id', prContext.prId)
+        .in('content_hash', contentHashes);
+      
+      if (lookupError) throw lookupError;
+      
+      const indexed = new Set(existing.map(row => row.content_hash));
+      risks = risks.filter((risk, i) => !indexed.has(contentHashes[i]));
+      contentHashes = contentHashes.filter(hash => !indexed.has(hash));
+      if (risks.length === 0) return [];
+    }
+    
+    const embeddings = await generateEmbeddings(risks.map(getRiskText));
+    
+    const createdAt = new Date().toISOString();
+    const rows = risks.map((risk, i) => ({
+      risk_id: risk.id,
+      pr_id: prContext.prId,
+      repo_slug: prContext.repoSlug,
+      risk_type: risk.type,
+      severity: risk.severity,
+      category: risk.category,
+      content_hash: contentHashes[i],
+      embedding: toPgVector(embeddings[i]),
+      metadata: {
+        name: risk.name,
+        description: risk.description,
+        snippet: risk.snippet,
+        lineNumber: risk.lineNumber
+      },
+      created_at: createdAt
+    }));
+    
+    const { data, error } = await getSupabase()
+      .from('risk_embeddings')
+      .insert(rows);
+    
+    if (error) throw error;
+    
+    return data;
+    
+  } catch (error) {
+    console.error('Failed to store risk embeddings:', error);
+    throw error;
+  }
+}
+
+/**
+ * Search for similar past risks using vector similarity,
+ * optionally limited to risks recorded in the last `daysBack` days.
+ * `probes` raises ivfflat recall for this call at some latency cost.
  */
-export async function searchSimilarRisks(risk, limit = 5) {
+export async function searchSimilarRisks(risk, limit = 5, options = {}) {
   try {
+    // The cutoff is applied in SQL so stale rows never reach the distance scan
+    const minCreatedAt = options.daysBack
+      ? new Date(Date.now() - options.daysBack * 24 * 60 * 60 * 1000).toISOString()
+      : null;
+    
     // Generate embedding for current risk
-    const queryEmbedding = await generateEmbedding(
-      `${risk.name} ${risk.description} ${risk.snippet}`
-    );
+    const queryEmbedding = await generateEmbedding(getRiskText(risk));
     
     // Perform vector similarity search
-    const { data, error } = await supabase.rpc('match_risks', {
-      query_embedding: queryEmbedding,
-      match_threshold: 0.7,
-      match_count: limit
+    const { data, error } = await getSupabase().rpc('match_risks', {
+      ...MATCH_RISKS_PARAMS,
+      query_embedding: toPgVector(queryEmbedding),
+      match_count: limit,
+      ...(minCreatedAt && { min_created_at: minCreatedAt }),
+      ...(options.probes && { probes: options.probes })
     });
     
     if (error) throw error;
@@ -87,12 +173,205 @@ export async function searchSimilarRisks(risk, limit = 5) {
  * Generate embedding using OpenAI
  */
 async function generateEmbedding(text) {
-  const response = await openai.embeddings.create({
-    model: 'text-embedding-3-small',
-    input: text.substring(0, 8000) // Limit input length
+  const input = text.substring(0, 8000); // Limit input length
+  const cacheKey = getEmbeddingCacheKey(input);
+  
+  const cached = embeddingMemo.get(cacheKey) || await loadCachedEmbedding(cacheKey);
+  if (cached) return embeddingMemo.set(cacheKey, cached);
+  
+  const response = await getOpenAI().embeddings.create({
+    model: EMBEDDING_MODEL,
+    input,
+    encoding_format: 'base64'
+  });
+  
+  const embedding = normalizeEmbedding(decodeEmbedding(response.data[0].embedding));
+  embeddingMemo.set(cacheKey, embedding);
+  await saveCachedEmbedding(cacheKey, embedding);
+  
+  return embedding;
+}
+
+/**
+ * Generate embeddings for many texts, keeping several batch requests in flight
+ */
+export async function generateEmbeddings(texts, options = {}) {
+  const {
+    batchSize = EMBEDDING_BATCH_SIZE,
+    concurrency = EMBEDDING_CONCURRENCY
+  } = options;
+  
+  // Identical texts (e.g. the same risk repeated across files) are hashed,
+  // looked up and embedded only once, then fanned back out by position
+  const positions = new Map();
+  const textIndex = texts.map(text => {
+    const input = text.substring(0, 8000);
+    if (!positions.has(input)) positions.set(input, positions.size);
+    return positions.get(input);
   });
   
-  return response.data[0].embedding;
+  const inputs = Array.from(positions.keys());
+  const cacheKeys = inputs.map(getEmbeddingCacheKey);
+  const embeddings = await Promise.all(cacheKeys.map(async key => {
+    const cached = embeddingMemo.get(key) || await loadCachedEmbedding(key);
+    return cached ? embeddingMemo.set(key, cached) : null;
+  }));
+  
+  // Only texts without a cached vector go to the API
+  const missing = [];
+  embeddings.forEach((embedding, i) => {
+    if (!embedding) missing.push(i);
+  });
+  
+  // Batch similar-length inputs together and cap each request's total size;
+  // results are written back by original index, so input order is preserved
+  missing.sort((a, b) => inputs[a].length - inputs[b].length);
+  
+  const batches = [];
+  let batch = [];
+  let batchChars = 0;
+  for (const i of missing) {
+    const full = batch.length === batchSize ||
+      (batch.length > 0 && batchChars + inputs[i].length > EMBEDDING_BATCH_CHAR_BUDGET);
+    if (full) {
+      batches.push(batch);
+      batch = [];
+      batchChars = 0;
+    }
+    batch.push(i);
+    batchChars += inputs[i].length;
+  }
+  if (batch.length > 0) batches.push(batch);
+  
+  let nextBatch = 0;
+  
+  // Each worker pulls the next pending batch, so at most `concurrency` requests run at once
+  const worker = async () => {
+    while (nextBatch < batches.length) {
+      const batch = batches[nextBatch++];
+      const response = await getOpenAI().embeddings.create({
+        model: EMBEDDING_MODEL,
+        input: batch.map(i => inputs[i]),
+        encoding_format: 'base64'
+      });
+      
+      await Promise.all(response.data.map(item => {
+        const i = batch[item.index];
+        embeddings[i] = embeddingMemo.set(
+          cacheKeys[i],
+          normalizeEmbedding(decodeEmbedding(item.embedding))
+        );
+        return saveCachedEmbedding(cacheKeys[i], embeddings[i]);
+      }));
+    }
+  };
+  
+  await Promise.all(
+    Array.from({ length: Math.min(concurrency, batches.length) }, worker)
+  );
+  
+  return textIndex.map(i => embeddings[i]);
+}
+
+/**
+ * Read an embedding from the Forge storage cache; a failed read counts as a miss
+ */
+async function loadCachedEmbedding(cacheKey) {
+  try {
+    const entry = await storage.get(getEmbeddingSlotKey(cacheKey));
+    // Slots are shared, so only an entry written for this exact input is a hit
+    return entry && entry.key === cacheKey ? decodeEmbedding(entry.embedding) : null;
+  } catch (error) {
+    console.error('Embedding cache read failed:', error);
+    return null;
+  }
+}
+
+/**
+ * Write an embedding to the Forge storage cache as base64 float32;
+ * the caller already has the vector, so a failed write is only logged
+ */
+async function saveCachedEmbedding(cacheKey, embedding) {
+  try {
+    const packed = Float32Array.from(embedding);
+    await storage.set(getEmbeddingSlotKey(cacheKey), {
+      key: cacheKey,
+      embedding: Buffer.from(packed.buffer).toString('base64')
+    });
+  } catch (error) {
+    console.error('Embedding cache write failed:', error);
+  }
+}
+
+/**
+ * Decode a base64 embedding (little-endian float32) into a Float32Array.
+ * Decodes straight into the array's own memory, skipping an intermediate Buffer and copy.
+ */
+function decodeEmbedding(encoded) {
+  if (typeof encoded !== 'string') return encoded;
+  
+  const embedding = new Float32Array(Buffer.byteLength(encoded, 'base64') / 4);
+  Buffer.from(embedding.buffer).write(encoded, 'base64');
+  
+  return embedding;
+}
+
+/**
+ * Scale an embedding to unit length in place, so inner product equals cosine similarity
+ */
+function normalizeEmbedding(embedding) {
+  let sumSquares = 0;
+  for (let i = 0; i < embedding.length; i++) {
+    sumSquares += embedding[i] * embedding[i];
+  }
+  if (sumSquares === 0) return embedding;
+  
+  const scale = 1 / Math.sqrt(sumSquares);
+  for (let i = 0; i < embedding.length; i++) {
+    embedding[i] *= scale;
+  }
+  
+  return embedding;
+}
+
+/**
+ * Text used to embed a risk, shared by storage and search so both hit the same cache entry
+ */
+function getRiskText(risk) {
+  return `${risk.name} ${risk.description} ${risk.snippet}`;
+}
+
+/**
+ * Hash of the text a risk is embedded from, used to recognize already-indexed risks
+ */
+function getRiskContentHash(risk) {
+  return createHash('sha256').update(getRiskText(risk)).digest('hex');
+}
+
+/**
+ * Serialize a vector as a pgvector text literal ('[0.1,0.2,...]'),
+ * which Postgres casts directly instead of decoding a JSON float array
+ */
+function toPgVector(embedding) {
+  return `[${embedding.join(',')}]`;
+}
+
+/**
+ * Cache key for an embedding, derived from model + input content
+ */
+function getEmbeddingCacheKey(input) {
+  return createHash('sha256')
+    .update(`${EMBEDDING_MODEL}\0${input}`)
+    .digest('hex');
+}
+
+/**
+ * Forge storage key holding a cached embedding. Keys map onto a fixed set of
+ * slots (a newer entry replaces an older one), so the cache's storage use is
+ * bounded instead of growing with every distinct risk text
+ */
+function getEmbeddingSlotKey(cacheKey) {
+  return `embedding-cache-${parseInt(cacheKey.slice(0, 8), 16) % EMBEDDING_CACHE_SLOTS}`;
 }
 
 /**
@@ -101,7 +380,7 @@ async function generateEmbedding(text) {
 export async function initializeVectorTable() {
   // SQL to create table with pgvector extension
   const createTableSQL = `
-    -- Enable pgvector extension
+    -- Enable pgvector extension (0.7+ for halfvec)
     CREATE EXTENSION IF NOT EXISTS vector;
     
     -- Create risk embeddings table
@@ -113,23 +392,60 @@ export async function initializeVectorTable() {
       risk_type TEXT NOT NULL,
       severity TEXT NOT NULL,
       category TEXT NOT NULL,
-      embedding vector(1536),
+      content_hash TEXT,
+      embedding halfvec(1536),
       metadata JSONB,
       resolved_at TIMESTAMP,
       created_at TIMESTAMP DEFAULT NOW()
     );
     
-    -- Create index for vector similarity search
+    -- Convert tables created with full-precision vectors; half precision
+    -- halves storage and index memory at no practical cost to cosine ranking.
+    -- Guarded on the current column type so re-runs skip the table rewrite
+    DO $convert$
+    BEGIN
+      IF (SELECT format_type(a.atttypid, a.atttypmod)
+          FROM pg_attribute a
+          WHERE a.attrelid = 'risk_embeddings'::regclass
+            AND a.attname = 'embedding'
+            AND NOT a.attisdropped) <> 'halfvec(1536)' THEN
+        DROP INDEX IF EXISTS risk_embeddings_embedding_idx;
+        ALTER TABLE risk_embeddings
+        ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
+      END IF;
+    END
+    $convert$;
+    
+    -- Create index for vector similarity search; embeddings are stored
+    -- unit-length, so inner product ranks the same as cosine with less work
     CREATE INDEX IF NOT EXISTS risk_embeddings_embedding_idx 
     ON risk_embeddings 
-    USING ivfflat (embedding vector_cosine_ops)
+    USING ivfflat (embedding halfvec_ip_ops)
     WITH (lists = 100);
     
-    -- Create function for similarity search
+    -- Content hash used to skip risks already indexed for a PR
+    ALTER TABLE risk_embeddings ADD COLUMN IF NOT EXISTS content_hash TEXT;
+    CREATE INDEX IF NOT EXISTS risk_embeddings_pr_content_idx
+    ON risk_embeddings (pr_id, content_hash);
+    
+    -- Index for the optional recency filter in match_risks
+    CREATE INDEX IF NOT EXISTS risk_embeddings_created_at_idx
+    ON risk_embeddings (created_at);
+    
+    -- Create function for similarity search (drop earlier signatures
+    -- so they do not shadow this one).
+    -- probes trades latency for recall per call; leave NULL for the server
+    -- default (1). With lists = 100, ~10 probes is a good recall setting;
+    -- past ~100k rows, rebuild with lists ~ sqrt(rows) or switch to HNSW.
+    DROP FUNCTION IF EXISTS match_risks(vector, FLOAT, INT);
+    DROP FUNCTION IF EXISTS match_risks(vector, FLOAT, INT, TIMESTAMP);
+    DROP FUNCTION IF EXISTS match_risks(halfvec, FLOAT, INT, TIMESTAMP);
     CREATE OR REPLACE FUNCTION match_risks(
-      query_embedding vector(1536),
+      query_embedding halfvec(1536),
       match_threshold FLOAT,
-      match_count INT
+      match_count INT,
+      min_created_at TIMESTAMP DEFAULT NULL,
+      probes INT DEFAULT NULL
     )
     RETURNS TABLE (
       risk_id TEXT,
@@ -142,22 +458,31 @@ export async function initializeVectorTable() {
       resolved_at TIMESTAMP,
       similarity FLOAT
     )
-    LANGUAGE SQL STABLE
+    LANGUAGE plpgsql
     AS $$
+    BEGIN
+      IF probes IS NOT NULL THEN
+        -- Transaction-local, so it only affects this call
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+      END IF;
+      
+      RETURN QUERY
       SELECT
-        risk_id,
-        pr_id,
-        repo_slug,
-        risk_type,
-        severity,
-        category,
-        metadata,
-        resolved_at,
-        1 - (embedding <=> query_embedding) AS similarity
-      FROM risk_embeddings
-      WHERE 1 - (embedding <=> query_embedding) > match_threshold
-      ORDER BY embedding <=> query_embedding
+        r.risk_id,
+        r.pr_id,
+        r.repo_slug,
+        r.risk_type,
+        r.severity,
+        r.category,
+        r.metadata,
+        r.resolved_at,
+        -(r.embedding <#> query_embedding) AS similarity
+      FROM risk_embeddings r
+      WHERE (min_created_at IS NULL OR r.created_at >= min_created_at)
+        AND -(r.embedding <#> query_embedding) > match_threshold
+      ORDER BY r.embedding <#> query_embedding
       LIMIT match_count;
+    END;
     $$;
   `;
   
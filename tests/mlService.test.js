@@ -0,0 +1,98 @@
+import mlService, {
+  generateTFIDFVector,
+  getTextVector,
+  hashWord,
+  insertTopIndex
+} from '../src/services/mlService_v3';
+
+// Mock Forge storage (team PR history)
+jest.mock('@forge/api', () => ({
+  storage: {
+    get: jest.fn(),
+    set: jest.fn()
+  }
+}));
+
+// Mock Supabase seed data
+jest.mock('../src/services/supabaseService', () => ({
+  getBenchmarkPRs: jest.fn(),
+  getRiskyPatterns: jest.fn()
+}));
+
+const { storage } = require('@forge/api');
+const supabaseService = require('../src/services/supabaseService');
+
+beforeEach(() => {
+  jest.clearAllMocks();
+  supabaseService.getBenchmarkPRs.mockResolvedValue([]);
+  supabaseService.getRiskyPatterns.mockResolvedValue([]);
+});
+
+describe('Similar PR search', () => {
+  test('does not match a PR against its own stored copies', async () => {
+    const prData = {
+      id: 'bitbucket-42',
+      title: 'Add retry logic to payment webhook handler',
+      body: 'Retries failed webhook deliveries with backoff'
+    };
+    storage.get.mockResolvedValue([
+      { ...prData, analyzed_at: 1 },
+      { ...prData, analyzed_at: 2 },
+      { id: 'bitbucket-7', title: 'Add retry logic to email webhook handler', body: 'Backoff on failures' }
+    ]);
+
+    const similar = await mlService.findSimilarPRs(prData, 10);
+
+    expect(similar.map(pr => pr.id)).toEqual(['bitbucket-7']);
+  });
+});
+
+describe('Top-k selection', () => {
+  // Scores drawn from a small set so ties are common
+  const scores = [0.5, 0.9, 0.1, 0.9, 0.5, 0.3, 0.9, 0.1, 0.5, 0.7];
+
+  test.each([0, 1, 3, 5, scores.length, scores.length + 2])(
+    'keeps the same top %i rows as a stable descending sort',
+    k => {
+      const top = [];
+      for (let i = 0; i < scores.length; i++) {
+        insertTopIndex(top, i, scores, k);
+      }
+
+      const expected = scores
+        .map((_, i) => i)
+        .sort((a, b) => scores[b] - scores[a])
+        .slice(0, k);
+      expect(top).toEqual(expected);
+    }
+  );
+});
+
+describe('TF-IDF vectors', () => {
+  const norm = vector => Math.sqrt(vector.reduce((sum, x) => sum + x * x, 0));
+
+  test('are unit length', () => {
+    const vector = generateTFIDFVector('Fix token refresh race in the login flow; refresh token once');
+
+    expect(vector).toHaveLength(256);
+    expect(norm(vector)).toBeCloseTo(1, 5);
+  });
+
+  test('are all zeros for text without words', () => {
+    expect(norm(generateTFIDFVector('a b !'))).toBe(0);
+  });
+
+  test('are memoized per text with the same values', () => {
+    const text = 'Refactor payment retry handling';
+
+    const first = getTextVector(text);
+
+    expect(getTextVector(text)).toBe(first);
+    expect(Array.from(first)).toEqual(Array.from(generateTFIDFVector(text)));
+  });
+
+  test('bucket words with 32-bit FNV-1a', () => {
+    expect(hashWord('a')).toBe(0xe40c292c);
+    expect(hashWord('foobar')).toBe(0xbf9cf968);
+  });
+});
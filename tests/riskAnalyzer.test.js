@@ -1,5 +1,20 @@
 import { analyzeRisks } from '../src/riskAnalyzer';
 
+// Mock the shared OpenAI client used for LLM enhancement
+const mockCreate = jest.fn();
+jest.mock('../src/services/openaiClient', () => ({
+  getOpenAI: () => ({ chat: { completions: { create: mockCreate } } })
+}));
+
+const llmResponse = insights => ({
+  choices: [{ message: { content: JSON.stringify(insights) } }]
+});
+
+beforeEach(() => {
+  mockCreate.mockReset();
+  mockCreate.mockResolvedValue(llmResponse([]));
+});
+
 describe('Risk Analyzer', () => {
   test('detects SQL injection pattern', async () => {
     const diff = `
@@ -48,6 +63,31 @@ describe('Risk Analyzer', () => {
     expect(risks.find(r => r.type === 'todo-comment').severity).toBe('LOW');
   });
   
+  test('reports the line of each occurrence', async () => {
+    const diff = `
++   const a = eval(first);
++   const b = 1;
++   const c = eval(first);
+    `;
+    
+    const risks = await analyzeRisks(diff);
+    
+    const evalLines = risks.filter(r => r.type === 'eval-usage').map(r => r.lineNumber);
+    expect(evalLines).toEqual([2, 4]);
+  });
+  
+  test('reports overlapping matches from different patterns', async () => {
+    const diff = `
++   exec("token = 'abcdefghijk'" + id + "'");
+    `;
+
+    const risks = await analyzeRisks(diff);
+
+    const types = risks.map(r => r.type);
+    expect(types).toContain('sql-injection');
+    expect(types).toContain('hardcoded-secret');
+  });
+
   test('returns empty array for clean code', async () => {
     const diff = `
 +   function add(a, b) {
@@ -71,3 +111,80 @@ describe('Risk Analyzer', () => {
     expect(['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']).toContain(risks[0].priority);
   });
 });
+
+describe('Analysis cache', () => {
+  test('serves a repeated diff without a second LLM call', async () => {
+    const diff = `
++   const out = eval(cachedInput);
+    `;
+
+    const first = await analyzeRisks(diff);
+    const second = await analyzeRisks(diff);
+
+    expect(mockCreate).toHaveBeenCalledTimes(1);
+    expect(second).toEqual(first);
+  });
+
+  test('returns copies that callers can mutate safely', async () => {
+    const diff = `
++   const out = eval(copiedInput);
+    `;
+
+    const first = await analyzeRisks(diff);
+    first[0].severity = 'MUTATED';
+    const second = await analyzeRisks(diff);
+
+    expect(second).not.toBe(first);
+    expect(second[0].severity).toBe('HIGH');
+  });
+
+  test('does not cache results when the LLM call fails', async () => {
+    const diff = `
++   const out = eval(failedInput);
+    `;
+    mockCreate.mockRejectedValueOnce(new Error('rate limited'));
+
+    await analyzeRisks(diff);
+    await analyzeRisks(diff);
+
+    expect(mockCreate).toHaveBeenCalledTimes(2);
+  });
+});
+
+describe('LLM enhancement', () => {
+  test('skips the LLM when every risk has a canned fix', async () => {
+    const diff = `
++   // TODO: remove before release
++   console.log(debugState);
+    `;
+
+    const risks = await analyzeRisks(diff);
+
+    expect(mockCreate).not.toHaveBeenCalled();
+    expect(risks.map(r => r.type).sort()).toEqual(['console-log', 'todo-comment']);
+    risks.forEach(r => expect(r.suggestedFix).toBeDefined());
+  });
+
+  test('merges LLM insights onto the risks that were sent', async () => {
+    const diff = `
++   const password = "hunter2hunter2";
++   console.log(password);
++   const out = eval(mixedInput);
+    `;
+    mockCreate.mockResolvedValue(llmResponse([
+      { insight: 'secret insight', fix: 'secret fix' },
+      { insight: 'eval insight', fix: 'eval fix' }
+    ]));
+
+    const risks = await analyzeRisks(diff);
+    const byType = Object.fromEntries(risks.map(r => [r.type, r]));
+
+    expect(mockCreate).toHaveBeenCalledTimes(1);
+    expect(byType['hardcoded-secret'].llmInsight).toBe('secret insight');
+    expect(byType['hardcoded-secret'].suggestedFix).toBe('secret fix');
+    expect(byType['eval-usage'].llmInsight).toBe('eval insight');
+    expect(byType['eval-usage'].suggestedFix).toBe('eval fix');
+    expect(byType['console-log'].llmInsight).toBeUndefined();
+    expect(byType['console-log'].suggestedFix).not.toBe('secret fix');
+  });
+});
@@ -9,6 +9,7 @@ const {
   queryHistory,
   executeAction,
   fullWorkflow,
+  streamBatch,
   processBatch,
   formatRiskSummary,
   formatIncidents
@@ -506,6 +507,10 @@ describe('Full Workflow', () => {
 });
 
 describe('Batch Processing', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
   test('should process multiple changes', async () => {
     invoke.mockResolvedValue({
       content: JSON.stringify({
@@ -548,6 +553,67 @@ describe('Batch Processing', () => {
     expect(result.results.length).toBeGreaterThan(0);
     expect(result.errors).toHaveLength(1);
   });
+
+  test('should stream results in completion order', async () => {
+    // First change is slow, the rest answer immediately
+    let call = 0;
+    invoke.mockImplementation(() => {
+      const delay = call++ === 0 ? 50 : 0;
+      return new Promise(resolve => setTimeout(() => resolve({
+        content: JSON.stringify({ explanation: 'OK', risk_level: 'low', actions: [] })
+      }), delay));
+    });
+
+    const changes = [
+      { risk_score: 0.5, diff_snippet: 'slow' },
+      { risk_score: 0.6, diff_snippet: 'fast1' },
+      { risk_score: 0.7, diff_snippet: 'fast2' }
+    ];
+
+    const order = [];
+    for await (const item of streamBatch(changes, { concurrency: 2 })) {
+      order.push(item.index);
+    }
+
+    expect(order).toEqual([1, 2, 0]);
+  });
+
+  test('should cap in-flight workflows at the concurrency limit', async () => {
+    let active = 0;
+    let maxActive = 0;
+    invoke.mockImplementation(async () => {
+      active++;
+      maxActive = Math.max(maxActive, active);
+      await new Promise(resolve => setTimeout(resolve, 10));
+      active--;
+      return {
+        content: JSON.stringify({ explanation: 'OK', risk_level: 'low', actions: [] })
+      };
+    });
+
+    const changes = Array.from({ length: 6 }, (_, i) => ({
+      risk_score: 0.5,
+      diff_snippet: `test${i}`
+    }));
+
+    const items = [];
+    for await (const item of streamBatch(changes, { concurrency: 2 })) {
+      items.push(item);
+    }
+
+    expect(items).toHaveLength(6);
+    expect(maxActive).toBeLessThanOrEqual(2);
+  });
+
+  test('should yield nothing for an empty batch', async () => {
+    const items = [];
+    for await (const item of streamBatch([])) {
+      items.push(item);
+    }
+
+    expect(items).toEqual([]);
+    expect(invoke).not.toHaveBeenCalled();
+  });
 });
 
 describe('Input Validation', () => {
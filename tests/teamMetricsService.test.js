@@ -0,0 +1,48 @@
+import { getRecentMetrics } from '../src/services/teamMetricsService';
+
+// Mock Forge storage
+jest.mock('@forge/api', () => ({
+  storage: {
+    get: jest.fn(),
+    set: jest.fn()
+  }
+}));
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const NOW = 1700000000000;
+
+describe('Recent metrics', () => {
+  beforeEach(() => {
+    jest.spyOn(Date, 'now').mockReturnValue(NOW);
+  });
+
+  afterEach(() => {
+    jest.restoreAllMocks();
+  });
+
+  test('keeps only metrics strictly newer than the cutoff', () => {
+    const cutoff = NOW - 7 * DAY_MS;
+    const metrics = [cutoff - DAY_MS, cutoff - 1, cutoff, cutoff + 1, NOW]
+      .map(timestamp => ({ timestamp }));
+
+    const recent = getRecentMetrics(metrics, 7);
+
+    expect(recent.map(m => m.timestamp)).toEqual([cutoff + 1, NOW]);
+  });
+
+  test('matches a linear filter at every split point', () => {
+    const cutoff = NOW - 7 * DAY_MS;
+    for (let split = 0; split <= 5; split++) {
+      const metrics = Array.from({ length: 5 }, (_, i) => ({
+        timestamp: i < split ? cutoff - (split - i) : cutoff + 1 + i
+      }));
+
+      expect(getRecentMetrics(metrics, 7))
+        .toEqual(metrics.filter(m => m.timestamp > cutoff));
+    }
+  });
+
+  test('returns an empty list when there are no metrics', () => {
+    expect(getRecentMetrics([], 7)).toEqual([]);
+  });
+});
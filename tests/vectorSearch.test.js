@@ -0,0 +1,76 @@
+import { generateEmbeddings } from '../src/vectorSearch';
+
+// Mock the shared OpenAI client; each embedding is [input length, 1] so
+// results can be traced back to the text they came from
+const mockEmbed = jest.fn();
+jest.mock('../src/services/openaiClient', () => ({
+  getOpenAI: () => ({ embeddings: { create: mockEmbed } })
+}));
+
+// Mock Forge storage (embedding cache always misses)
+jest.mock('@forge/api', () => ({
+  storage: {
+    get: jest.fn().mockResolvedValue(undefined),
+    set: jest.fn().mockResolvedValue(undefined)
+  }
+}));
+
+jest.mock('@supabase/supabase-js', () => ({
+  createClient: jest.fn()
+}));
+
+const lengthOf = embedding => embedding[0] / embedding[1];
+
+beforeEach(() => {
+  mockEmbed.mockReset();
+  // Answer in reverse order; callers must place results by `index`
+  mockEmbed.mockImplementation(async ({ input }) => ({
+    data: input.map((text, index) => ({ index, embedding: [text.length, 1] })).reverse()
+  }));
+});
+
+describe('Batch embeddings', () => {
+  test('returns embeddings in input order', async () => {
+    const texts = ['order-long-text-here', 'order-a', 'order-medium-one'];
+
+    const embeddings = await generateEmbeddings(texts);
+
+    embeddings.forEach((embedding, i) => {
+      expect(lengthOf(embedding)).toBeCloseTo(texts[i].length);
+    });
+  });
+
+  test('embeds duplicate inputs once and fans them back out', async () => {
+    const texts = ['dup-alpha', 'dup-beta-text', 'dup-alpha'];
+
+    const embeddings = await generateEmbeddings(texts);
+
+    const sent = mockEmbed.mock.calls.flatMap(([req]) => req.input);
+    expect(sent.sort()).toEqual(['dup-alpha', 'dup-beta-text']);
+    expect(embeddings).toHaveLength(3);
+    expect(embeddings[2]).toBe(embeddings[0]);
+  });
+
+  test('splits requests by batch size', async () => {
+    const texts = Array.from({ length: 5 }, (_, i) => `split-size-${i}`);
+
+    const embeddings = await generateEmbeddings(texts, { batchSize: 2 });
+
+    expect(mockEmbed).toHaveBeenCalledTimes(3);
+    mockEmbed.mock.calls.forEach(([req]) => expect(req.input.length).toBeLessThanOrEqual(2));
+    expect(embeddings).toHaveLength(5);
+  });
+
+  test('splits requests by total input size', async () => {
+    // 60 inputs of 8000 chars exceed the 400k-char per-request budget
+    const texts = Array.from({ length: 60 }, (_, i) => `${i}`.padEnd(8000, 'x'));
+
+    await generateEmbeddings(texts);
+
+    expect(mockEmbed).toHaveBeenCalledTimes(2);
+    mockEmbed.mock.calls.forEach(([req]) => {
+      const chars = req.input.reduce((sum, text) => sum + text.length, 0);
+      expect(chars).toBeLessThanOrEqual(400000);
+    });
+  });
+});